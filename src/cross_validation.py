@@ -0,0 +1,102 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+import pandas as pd
+from threadpoolctl import threadpool_limits
+
+from src.data_splitting import KFoldSplit
+from src.model_building import build_pipeline
+from src.model_evaluation import RegressionModelEvaluation
+
+import logging
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+# data every worker trains on, set once per process by _init_worker
+_shared = {}
+
+def _init_worker(df: pd.DataFrame, target_column: str, build: Callable, threads: Optional[int]):
+    # with the fork start method the arguments are inherited, not pickled, so the
+    # workers read the parent's data frame pages, which are never written to
+    features = [position for position, column in enumerate(df.columns) if column != target_column]
+    _shared.update(df=df, features=features, target_column=target_column, build=build)
+    if threads is not None:
+        # one BLAS pool per worker would oversubscribe the cores
+        threadpool_limits(limits=threads)
+
+def _fit_fold(fold: tuple) -> tuple:
+    number, train, test, return_model = fold
+    df, features, target_column, build = _shared['df'], _shared['features'], _shared['target_column'], _shared['build']
+
+    # the training rows are copied once (about (k-1)/k of the frame per worker), rows
+    # and feature columns are taken together so no intermediate frame is made by a drop
+    X_train, y_train = df.iloc[train, features], df[target_column].iloc[train]
+    model = build(X_train).fit(X_train, y_train)
+    del X_train, y_train
+
+    metrics = RegressionModelEvaluation().model_evaluate(model, df.iloc[test, features], df[target_column].iloc[test])
+    return number, metrics, model if return_model else None
+
+class CrossValidator:
+    def __init__(self, splitter: KFoldSplit = None, build: Callable = build_pipeline, n_jobs: Optional[int] = None, return_models: bool = False):
+        '''
+        Train and evaluate one model per fold in a process pool
+
+        The splitter only produces row positions. Workers are forked from this process
+        where the platform allows it, so the full data frame is not copied into them.
+        Every worker does copy the training rows of its fold (about (k-1)/k of the
+        frame), since each fold fits its own preprocessing; peak memory is roughly the
+        frame plus n_jobs fold copies, lower n_jobs to bound it.
+
+        parameters:
+        splitter (KFoldSplit): fold strategy, default is 5 shuffled folds
+        build (Callable): returns an unfitted model for the training features of a fold (e.g. build_pipeline)
+        n_jobs (int): number of worker processes, default is one per fold up to the number of cores, 1 runs in this process
+        return_models (bool): keep the fitted model of every fold in models_
+        '''
+        self.splitter = splitter if splitter is not None else KFoldSplit()
+        self.build = build
+        self.n_jobs = n_jobs
+        self.return_models = return_models
+
+    def run(self, df: pd.DataFrame, target_column: str) -> pd.DataFrame:
+        '''
+        Cross-validate the model on the data frame
+
+        parameters:
+        df (pd.DataFrame): features and target
+        target_column (str): target column in the data set
+
+        return:
+        pd.DataFrame: evaluation metrics of every fold
+        '''
+        folds = self.splitter.split_data(df, target_column)
+        tasks = [(number, train, test, self.return_models) for number, (train, test) in enumerate(folds)]
+
+        n_jobs = self.n_jobs or min(len(tasks), os.cpu_count() or 1)
+        logger.info(f"Cross-validating {len(tasks)} folds with {n_jobs} worker(s)...")
+
+        if n_jobs == 1:
+            _init_worker(df, target_column, self.build, None)
+            try:
+                results = [_fit_fold(task) for task in tasks]
+            finally:
+                _shared.clear()
+        else:
+            # spawn-only platforms pickle the data once per worker instead
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+            threads = max(1, (os.cpu_count() or 1) // n_jobs)
+            with ProcessPoolExecutor(max_workers=n_jobs, mp_context=context, initializer=_init_worker, initargs=(df, target_column, self.build, threads)) as pool:
+                results = list(pool.map(_fit_fold, tasks))
+
+        results.sort(key=lambda result: result[0])
+        if self.return_models:
+            self.models_ = [model for _, _, model in results]
+
+        scores = pd.DataFrame([metrics for _, metrics, _ in results])
+        scores.index.name = 'fold'
+        logger.info(f"Cross-validation metrics (mean over folds): {scores.mean().to_dict()}")
+        return scores
@@ -0,0 +1,307 @@
+import os
+import json
+import hashlib
+from typing import Iterator, List, Optional
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import logging
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_NAME = '.cache'
+CACHE_EXTENSION = '.arrow'
+INDEX_FILE = 'index.json'
+HASH_BLOCK_SIZE = 1024 * 1024
+PROBE_ROWS = 1000
+
+def to_frame(data: pa.Table) -> pd.DataFrame:
+    '''
+    Convert cached columnar data to pandas the way the file readers would return it
+
+    parameters:
+    data (pa.Table or pa.RecordBatch): cached data
+
+    return:
+    pd.DataFrame: data frame with NaN (not None) marking missing strings
+    '''
+    df = data.to_pandas()
+    object_columns = df.select_dtypes(include='object').columns
+    if len(object_columns) > 0:
+        df[object_columns] = df[object_columns].where(df[object_columns].notna(), np.nan)
+    return df
+
+class DatasetCache:
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = 2 * 1024 ** 3):
+        '''
+        Columnar (Arrow IPC) cache of parsed data files keyed by content hash
+
+        Entries live in a `.cache` folder next to the raw file unless cache_dir is given.
+        Entry names start with the file name and a hash of its absolute path, so files with
+        the same name in different folders (data/a/train.csv, data/b/train.csv) can share
+        cache_dir. A changed source gets a new content hash, so its stale entries are
+        replaced on the next store.
+
+        parameters:
+        cache_dir (str): folder for cache entries, default is `.cache` next to the raw file
+        max_bytes (int): total size of the cache folder before least recently used entries are evicted
+        '''
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def _directory(self, file_path: str) -> str:
+        if self.cache_dir is not None:
+            return self.cache_dir
+        return os.path.join(os.path.dirname(os.path.abspath(file_path)), CACHE_DIR_NAME)
+
+    def _read_index(self, directory: str) -> dict:
+        try:
+            with open(os.path.join(directory, INDEX_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, directory: str, index: dict):
+        tmp_path = os.path.join(directory, f"{INDEX_FILE}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, os.path.join(directory, INDEX_FILE))
+
+    def fingerprint(self, file_path: str) -> str:
+        '''
+        Content hash of the file, reused from the index while size and mtime are unchanged
+
+        parameters:
+        file_path (str): path to the raw file
+
+        return:
+        str: hex digest of the file content
+        '''
+        return self.fingerprint_all([file_path])[0]
+
+    def fingerprint_all(self, file_paths: List[str]) -> List[str]:
+        '''
+        Content hashes of several files with one index update per cache folder
+
+        Call this in the parent before handing files to worker processes: the workers
+        then find every digest in the index and never rewrite it concurrently.
+
+        parameters:
+        file_paths (List[str]): paths to the raw files
+
+        return:
+        List[str]: hex digests in the order of file_paths
+        '''
+        digests, changed = [], {}
+        indexes = {}
+        for file_path in file_paths:
+            source = os.path.abspath(file_path)
+            stat = os.stat(source)
+            directory = self._directory(file_path)
+            if directory not in indexes:
+                indexes[directory] = self._read_index(directory)
+            index = indexes[directory]
+
+            entry = index.get(source)
+            if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+                digests.append(entry['digest'])
+                continue
+
+            hasher = hashlib.blake2b(digest_size=16)
+            with open(source, 'rb') as f:
+                for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                    hasher.update(block)
+            digest = hasher.hexdigest()
+
+            index[source] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'digest': digest}
+            changed[directory] = index
+            digests.append(digest)
+
+        for directory, index in changed.items():
+            try:
+                os.makedirs(directory, exist_ok=True)
+                # merge with entries other processes wrote since the index was read
+                self._write_index(directory, {**self._read_index(directory), **index})
+            except OSError as e:
+                # the digests are still valid, they are only recomputed on the next run
+                logger.warning(f"Can not write the cache index in {directory}: {e}")
+        return digests
+
+    def source_key(self, file_path: str) -> str:
+        '''
+        Name prefix of every cache entry of the file, whatever its content
+
+        parameters:
+        file_path (str): path to the raw file
+
+        return:
+        str: file name and a hash of the absolute path
+        '''
+        source = os.path.abspath(file_path)
+        return f"{os.path.basename(source)}.{hashlib.blake2b(source.encode(), digest_size=4).hexdigest()}"
+
+    def entry_path(self, file_path: str, variant: Optional[str] = None) -> str:
+        '''
+        Path of the cache entry for the current content of the file
+
+        parameters:
+        file_path (str): path to the raw file
+        variant (str): distinguishes different data read from the same file (e.g. an archive member pattern)
+
+        return:
+        str: path to the Arrow IPC file
+        '''
+        key = f"{self.source_key(file_path)}.{self.fingerprint(file_path)}"
+        if variant is not None:
+            key += '.' + hashlib.blake2b(variant.encode(), digest_size=4).hexdigest()
+        return os.path.join(self._directory(file_path), f"{key}{CACHE_EXTENSION}")
+
+    def load(self, file_path: str, variant: Optional[str] = None, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        '''
+        Memory-map the cached copy of the file into a data frame
+
+        parameters:
+        file_path (str): path to the raw file
+        variant (str): variant the entry was stored under
+        columns (List[str]): columns to convert, the others are never touched in the mapped file
+
+        return:
+        pd.DataFrame or None if there is no entry for the current content (or the cache can not be read)
+        '''
+        try:
+            path = self.entry_path(file_path, variant)
+            if not os.path.exists(path):
+                return None
+
+            logger.info(f"Loading {file_path} from cache {path}")
+            with pa.memory_map(path) as source:
+                table = pa.ipc.open_file(source).read_all()
+                data = to_frame(table if columns is None else table.select(columns))
+        except (OSError, pa.ArrowInvalid) as e:
+            logger.warning(f"Can not read the cache entry of {file_path}, parsing the file instead: {e}")
+            return None
+
+        # mark as recently used for eviction
+        self._touch(path)
+        return data
+
+    def _touch(self, path: str):
+        try:
+            os.utime(path)
+        except OSError as e:
+            logger.warning(f"Can not update the cache entry {path}: {e}")
+
+    def load_chunks(self, file_path: str, chunksize: Optional[int] = None, chunk_bytes: Optional[int] = None, variant: Optional[str] = None, columns: Optional[List[str]] = None) -> Optional[Iterator[pd.DataFrame]]:
+        '''
+        Stream the cached copy of the file as data frame chunks
+
+        parameters:
+        file_path (str): path to the raw file
+        chunksize (int): number of rows per chunk
+        chunk_bytes (int): in-memory size per chunk, used when chunksize is not given
+        variant (str): variant the entry was stored under
+        columns (List[str]): columns to stream, default is every column
+
+        return:
+        Iterator[pd.DataFrame] or None if there is no entry for the current content (or the cache can not be read)
+        '''
+        try:
+            path = self.entry_path(file_path, variant)
+            if not os.path.exists(path):
+                return None
+        except OSError as e:
+            logger.warning(f"Can not read the cache of {file_path}, parsing the file instead: {e}")
+            return None
+
+        def chunks():
+            with pa.memory_map(path) as source:
+                table = pa.ipc.open_file(source).read_all()
+                if columns is not None:
+                    table = table.select(columns)
+                rows = chunksize
+                if rows is None:
+                    probe = to_frame(table.slice(0, PROBE_ROWS))
+                    row_bytes = probe.memory_usage(index=False, deep=True).sum() / max(len(probe), 1)
+                    rows = max(1, int(chunk_bytes // max(row_bytes, 1)))
+                for batch in table.to_batches(max_chunksize=rows):
+                    yield to_frame(batch)
+            self._touch(path)
+
+        logger.info(f"Streaming {file_path} from cache {path}")
+        return chunks()
+
+    def store(self, file_path: str, df: pd.DataFrame, variant: Optional[str] = None):
+        '''
+        Write the parsed data frame as the cache entry of the file
+
+        parameters:
+        file_path (str): path to the raw file the data frame was parsed from
+        df (pd.DataFrame): parsed data
+        variant (str): distinguishes different data read from the same file
+        '''
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            logger.warning(f"Data from {file_path} can not be cached: {e}")
+            return
+
+        if table.nbytes > self.max_bytes:
+            logger.warning(f"Data from {file_path} exceeds the cache size limit. Skip caching")
+            return
+
+        tmp_path = None
+        try:
+            directory = self._directory(file_path)
+            os.makedirs(directory, exist_ok=True)
+            path = self.entry_path(file_path, variant)
+
+            # drop entries of previous versions of the same file, entries of other files are kept
+            prefix = f"{self.source_key(file_path)}."
+            current = f"{prefix}{self.fingerprint(file_path)}."
+            for name in os.listdir(directory):
+                if name.startswith(prefix) and name.endswith(CACHE_EXTENSION) and not name.startswith(current):
+                    os.remove(os.path.join(directory, name))
+
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with pa.OSFile(tmp_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_path, path)
+            logger.info(f"Cached {file_path} at {path}")
+
+            self.evict(directory, keep=path)
+        except OSError as e:
+            # the parsed data is still returned, only later runs parse the file again
+            logger.warning(f"Data from {file_path} can not be cached: {e}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def evict(self, directory: str, keep: Optional[str] = None):
+        '''
+        Remove least recently used entries until the cache fits into max_bytes
+
+        parameters:
+        directory (str): cache folder
+        keep (str): entry that must not be evicted
+        '''
+        entries = []
+        for name in os.listdir(directory):
+            if name.endswith(CACHE_EXTENSION):
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            logger.info(f"Evicting cache entry {path}")
+            os.remove(path)
+            total -= size
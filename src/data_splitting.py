@@ -1,7 +1,19 @@
+import os
+import time
+import uuid
+import tempfile
 from abc import ABC, abstractmethod
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 from sklearn.model_selection import train_test_split, KFold
-from typing import Tuple
+from typing import List, Optional, Tuple
+
+from src.data_cache import to_frame
+
+# name of the shared split files, split-<uuid>.arrow
+SPLIT_PREFIX = 'split-'
+SPLIT_EXTENSION = '.arrow'
 
 import logging
 
@@ -35,6 +47,20 @@ class DataSplittingStrategy(ABC):
         Returns:
         X, y: Features and target
         '''
+        self.check_data(df, target_column)
+
+        X = df.drop(columns=[target_column])
+        y = df[target_column]
+        return X, y
+
+    def check_data(self, df: pd.DataFrame, target_column: str):
+        '''
+        Check that df is a data frame with the target column
+
+        Parameters:
+        df (pd.DataFrame): pandas data frame
+        target_column (str): target column in the data set
+        '''
         if df is None:
             logger.error("Received a NoneType DataFrame")
             raise ValueError("Input df must be non-null")
@@ -46,10 +72,6 @@ class DataSplittingStrategy(ABC):
         if target_column not in df.columns:
             logger.error(f"Column '{target_column}' does not exist in the DataFrame.")
             raise ValueError(f"Column '{target_column}' does not exist in the DataFrame.")
-        
-        X = df.drop(columns=[target_column])
-        y = df[target_column]
-        return X, y
 
 # concrete classes
 
@@ -88,41 +110,174 @@ class TrainTestSplit(DataSplittingStrategy):
         return X_train, X_test, y_train, y_test
     
 # K-Fold
-# class KFoldSplit(DataSplittingStrategy):
-#     def __init__(self, n_splits:int=5, shuffle: bool=True, random_state: int=42):
-#         '''
-#         Initialize the strategy with number of splits, shuffle, and random state.
-
-#         Parameters:
-#             n_splits (int): Number of folds.
-#             shuffle (bool): Whether to shuffle the data before splitting.
-#             random_state (int): Random seed for reproducibility.
-#         '''
-#         self.n_splits = n_splits
-#         self.shuffle = shuffle
-#         self.random_state = random_state
-    
-#     def split_data(self, df: pd.DataFrame, target_column: str):
-#         '''
-#         Split the data into K folds for cross-validation.
-
-#         Parameters:
-#             df (pd.DataFrame): Data Frame that need to be splitted.
-#             target_column (str): The target variable.
-
-#         Returns:
-#             KFold object: An iterator over the K folds.
-#         '''
-#         logger.info("Splitting data using K-Fold Cross-Validation...")
-
-#         X, y = self.get_features_and_target(df, target_column)
-
-#         return KFold(
-#             n_splits=self.n_splits,
-#             shuffle=self.shuffle,
-#             random_state=self.random_state
-#         ).split(X, y)
-    
+class KFoldSplit(DataSplittingStrategy):
+    def __init__(self, n_splits:int=5, shuffle: bool=True, random_state: int=42):
+        '''
+        Initialize the strategy with number of splits, shuffle, and random state.
+
+        Parameters:
+            n_splits (int): Number of folds.
+            shuffle (bool): Whether to shuffle the data before splitting.
+            random_state (int): Random seed for reproducibility.
+        '''
+        self.n_splits = n_splits
+        self.shuffle = shuffle
+        self.random_state = random_state
+
+    def split_data(self, df: pd.DataFrame, target_column: str) -> List[Tuple[np.ndarray, np.ndarray]]:
+        '''
+        Split the data into K folds for cross-validation.
+
+        Only row positions are returned, the folds are taken from the one data frame
+        when they are used (e.g. df.iloc[train]), so no fold is copied up front.
+
+        Parameters:
+            df (pd.DataFrame): Data Frame that need to be splitted.
+            target_column (str): The target variable.
+
+        Returns:
+            list: (train positions, test positions) int32 arrays for every fold
+        '''
+        logger.info("Splitting data using K-Fold Cross-Validation...")
+
+        self.check_data(df, target_column)
+
+        # KFold only needs the number of rows
+        folds = KFold(
+            n_splits=self.n_splits,
+            shuffle=self.shuffle,
+            random_state=self.random_state if self.shuffle else None
+        ).split(np.empty((len(df), 0)))
+
+        return [(train.astype('int32'), test.astype('int32')) for train, test in folds]
+
+# shared split
+class SharedSplit:
+    def __init__(self, path: str, rows: np.ndarray, target_column: str):
+        '''
+        Lightweight handle to some rows of a data frame written once to an Arrow IPC file
+
+        Only the path and the row positions travel between steps, every step maps the
+        same file and converts just the rows it needs.
+
+        Parameters:
+            path (str): Arrow IPC file with the full data frame
+            rows (np.ndarray): int32 row positions of this split
+            target_column (str): The target variable.
+        '''
+        self.path = path
+        self.rows = rows
+        self.target_column = target_column
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __repr__(self) -> str:
+        return f"SharedSplit(path='{self.path}', rows={len(self.rows)}, target_column='{self.target_column}')"
+
+    def load(self) -> Tuple[pd.DataFrame, pd.Series]:
+        '''
+        Map the shared file and take the rows of this split
+
+        Returns:
+            X, y: Features and target of the split
+        '''
+        with pa.memory_map(self.path) as source:
+            table = pa.ipc.open_file(source).read_all()
+            df = to_frame(table.take(pa.array(self.rows)))
+
+        return df.drop(columns=[self.target_column]), df[self.target_column]
+
+    def remove(self):
+        '''
+        Delete the shared file, every handle to it becomes unusable
+        '''
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+class SharedMemorySplit(DataSplittingStrategy):
+    def __init__(self, test_size: float=0.2, random_state: int=42, directory: Optional[str]=None, max_age: float=24 * 3600):
+        '''
+        Train-test split that writes the data once and hands out row positions
+
+        The consumer of the last handle removes the file (see SharedSplit.remove), files
+        of runs that failed before that are removed by a later split once they are old.
+
+        Parameters:
+            test_size (float): The proportion of the dataset to include in the test split.
+            random_state (int): Random seed for reproducibility.
+            directory (str): Folder for the shared file, default is /dev/shm (memory backed) when available, else the temp folder.
+            max_age (float): seconds after which split files left by earlier runs are removed, None to keep them
+        '''
+        self.test_size = test_size
+        self.random_state = random_state
+        self.directory = directory
+        self.max_age = max_age
+
+    def remove_stale(self, directory: str):
+        '''
+        Remove split files of earlier runs older than max_age, newer ones may still be in use
+
+        Parameters:
+            directory (str): Folder of the shared files
+        '''
+        if self.max_age is None:
+            return
+
+        cutoff = time.time() - self.max_age
+        for name in os.listdir(directory):
+            if not (name.startswith(SPLIT_PREFIX) and name.endswith(SPLIT_EXTENSION)):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    logger.info(f"Removed stale split file {path}")
+            except OSError as e:
+                # another run removed it first, or it is not ours to remove
+                logger.warning(f"Can not remove stale split file {path}: {e}")
+
+    def split_data(self, df: pd.DataFrame, target_column: str) -> Tuple[SharedSplit, SharedSplit]:
+        '''
+        Write the data frame once and split its rows into training and testing handles.
+
+        The rows are the same as TrainTestSplit with the same test size and random state.
+
+        Parameters:
+            df (pd.DataFrame): Data Frame that need to be splitted.
+            target_column (str): The target variable.
+
+        Returns:
+            train, test: SharedSplit handles over one shared file
+        '''
+        logger.info("Performing train-test splitting into a shared file...")
+
+        self.check_data(df, target_column)
+
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError) as e:
+            logger.error(f"Data frame can not be written to a shared file: {e}")
+            raise ValueError("Data frame has columns Arrow can not store (e.g. sparse columns), use train_test_split") from e
+
+        directory = self.directory
+        if directory is None:
+            directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+        os.makedirs(directory, exist_ok=True)
+        self.remove_stale(directory)
+        path = os.path.join(directory, f"{SPLIT_PREFIX}{uuid.uuid4().hex}{SPLIT_EXTENSION}")
+
+        with pa.OSFile(path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        logger.info(f"Wrote {len(df)} rows for the split to {path}")
+
+        train, test = train_test_split(
+            np.arange(len(df), dtype='int32'), test_size=self.test_size, random_state=self.random_state
+        )
+
+        return SharedSplit(path, train, target_column), SharedSplit(path, test, target_column)
+
 # stratified split
 class StratifiedSplit(DataSplittingStrategy):
     def __init__(self, test_size: float=0.2, random_state: int=42):
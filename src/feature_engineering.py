@@ -1,13 +1,37 @@
+import copy
+import json
 import pandas as pd
 from abc import ABC, abstractmethod
 import numpy as np
+import scipy.sparse as sp
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.exceptions import NotFittedError
 from sklearn.preprocessing import MinMaxScaler, OneHotEncoder, StandardScaler
+from sklearn.utils import murmurhash3_32
 
 import logging
 
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 logger = logging.getLogger(__name__)
 
+def sparse_columns(df: pd.DataFrame) -> list:
+    '''
+    Columns stored as pandas sparse arrays (e.g. a sparse one-hot block)
+    '''
+    return [column for column, dtype in df.dtypes.items() if isinstance(dtype, pd.SparseDtype)]
+
+def sparse_frame_to_csr(X: pd.DataFrame) -> sp.csr_matrix:
+    '''
+    Convert a frame of sparse columns to CSR without densifying, used inside model pipelines
+
+    parameters:
+    X (pd.DataFrame): frame whose columns are all sparse
+
+    return:
+    sp.csr_matrix: the same values, memory grows with the number of non-zeros
+    '''
+    return X.sparse.to_coo().tocsr()
+
 # define a base class for feature engineering strategy
 class FeatureEngineeringStrategy(ABC):
     @abstractmethod
@@ -23,6 +47,38 @@ class FeatureEngineeringStrategy(ABC):
         '''
         pass
 
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        '''
+        Transform a working frame that the caller owns, columns may be replaced in place
+
+        Strategies that can avoid copying the frame override this, the default falls back to transform.
+
+        parameters:
+        df (pd.DataFrame): working frame, not shared with the caller's input
+
+        return:
+        pd.DataFrame: the transformed working frame
+        '''
+        return self.transform(df)
+
+    def input_columns(self) -> list:
+        '''
+        Columns the strategy reads, used to plan a chain of strategies before running it
+        '''
+        return list(getattr(self, 'features', []))
+
+    def plan_columns(self, columns: list) -> list:
+        '''
+        Columns of the frame after the strategy ran, given the columns before
+
+        parameters:
+        columns (list): columns of the frame the strategy receives
+
+        return:
+        list: columns of the frame the strategy returns
+        '''
+        return list(columns)
+
 # create base class with strategies
 # log transformation mostly to target variable
 class LogTransformation(FeatureEngineeringStrategy):
@@ -44,16 +100,16 @@ class LogTransformation(FeatureEngineeringStrategy):
 
         return: pandas data frame with transformed features
         '''
+        # a shallow copy is enough, the transformed columns are new arrays
+        return self.apply(df.copy(deep=False))
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
         logger.info(f"Apply log transformation for the features: {self.features}")
-        
-        transformed_data = df.copy()
-        for feature in self.features:
-            transformed_data[feature] = np.log1p(
-                df[feature]
-            )
-        
+
+        df[self.features] = np.log1p(df[self.features])
+
         logger.info("log transformation completed")
-        return transformed_data
+        return df
 
 # standard scaling
 class StandardScaling(FeatureEngineeringStrategy):
@@ -77,11 +133,12 @@ class StandardScaling(FeatureEngineeringStrategy):
         return: 
         (pd.DataFrame): pandas data frame with scaled values
         '''
-        transformed_data = df.copy()
+        return self.apply(df.copy(deep=False))
 
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
         logger.info("Applying Standard Scaling...")
-        transformed_data[self.features] = self.scaler.fit_transform(df[self.features])
-        return transformed_data
+        df[self.features] = self.scaler.fit_transform(df[self.features])
+        return df
 
 class MinMaxScaling(FeatureEngineeringStrategy):
     def __init__(self, features: list, feature_range=(0, 1)):
@@ -105,24 +162,30 @@ class MinMaxScaling(FeatureEngineeringStrategy):
         return:
         (pd.DataFrame): pandas data frame with scaled values
         '''
+        return self.apply(df.copy(deep=False))
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
         logger.info("Applying Min Max Scaling...")
         logger.info(f"Scale {self.features} in a range of {self.scaler.feature_range}")
 
-        scaled_data = df.copy()
-        scaled_data[self.features] = self.scaler.fit_transform(df[self.features])
-        return scaled_data
+        df[self.features] = self.scaler.fit_transform(df[self.features])
+        return df
 
 # one hot encoding
 class OneHotEncoding(FeatureEngineeringStrategy):
-    def __init__(self, features: list):
+    def __init__(self, features: list, sparse: bool = False):
         '''
         initializes the OneHotEncoding with the specific features to encode.
 
         Parameters:
         features (list): The list of categorical features to apply the one-hot encoding to.
+        sparse (bool): keep the encoded block sparse, memory then grows with the non-zeros
+            instead of rows times categories. Sparse frames can not be stored as parquet
+            (step outputs), use build_pipeline(sparse=True) to encode sparsely inside the model
         '''
         self.features = features
-        self.encoder = OneHotEncoder(sparse=False, drop='first')
+        self.sparse = sparse
+        self.encoder = OneHotEncoder(sparse_output=sparse, drop='first')
 
     def transform(self, df: pd.DataFrame) -> pd.DataFrame:
         '''
@@ -134,36 +197,694 @@ class OneHotEncoding(FeatureEngineeringStrategy):
         Returns:
         pd.DataFrame: The dataframe with one-hot encoded features.
         '''
+        return self.apply(df.copy(deep=False))
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
         logger.info("Appling One Hot Encoder to provided categorical features")
 
-        transformed_data = df.copy()
+        encoded = self.encoder.fit_transform(df[self.features])
+        encoded_columns = self.encoder.get_feature_names_out(self.features)
+
+        if self.sparse:
+            # one sparse column per category, only the non-zeros are stored
+            encoded_df = pd.DataFrame.sparse.from_spmatrix(encoded, columns=encoded_columns)
+        else:
+            encoded_df = pd.DataFrame(encoded, columns=encoded_columns)
+
+        df.drop(columns=self.features, inplace=True)
+        df.reset_index(drop=True, inplace=True)
+        return pd.concat([df, encoded_df], axis=1, copy=False)
+
+    def plan_columns(self, columns: list) -> list:
+        # encoded column names are only known after fitting, later strategies can not refer to them
+        return [column for column in columns if column not in self.features]
 
-        encoded_df = pd.DataFrame(
-            self.encoder.fit_transform(df[self.features]),
-            columns=self.encoder.get_feature_names_out(self.features),
+def hash_token(value) -> str:
+    '''
+    One string form per value whatever the dtype it was read as, 60, 60.0 and np.int16(60) all give '60'
+    '''
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+# hashing trick
+class HashingEncoding(FeatureEngineeringStrategy):
+    def __init__(self, features: list, n_buckets: int = 256, signed: bool = True, sparse: bool = True, prefix: str = 'hash'):
+        '''
+        initializes the hashing encoder that maps categorical features into a fixed number of buckets
+
+        Nothing is fitted, so any chunk can be encoded on its own and every row costs
+        at most one non-zero per feature. The value `v` of feature `f` goes to bucket
+        murmurhash3(`f=v`) mod n_buckets, the same token layout as scikit-learn's FeatureHasher.
+        Values are hashed in one string form (see hash_token), so an integer column read
+        as float in a chunk with missing values lands in the same buckets.
+
+        parameters:
+        features (list): categorical features to encode
+        n_buckets (int): number of output columns
+        signed (bool): use the sign of the hash as value, so collisions tend to cancel out instead of adding up
+        sparse (bool): keep the buckets as sparse columns
+        prefix (str): prefix of the bucket column names
+        '''
+        self.features = features
+        self.n_buckets = n_buckets
+        self.signed = signed
+        self.sparse = sparse
+        self.prefix = prefix
+
+    def bucket_columns(self) -> list:
+        return [f"{self.prefix}_{i}" for i in range(self.n_buckets)]
+
+    def encode(self, df: pd.DataFrame) -> sp.csr_matrix:
+        '''
+        Hash the features of every row into a (rows x n_buckets) CSR matrix
+
+        Only the distinct values of each feature are hashed, rows are mapped through their codes.
+
+        parameters:
+        df (pd.DataFrame): data frame containing the features
+
+        return:
+        sp.csr_matrix: hashed features, missing values contribute nothing
+        '''
+        rows, buckets, signs = [], [], []
+        for feature in self.features:
+            codes, uniques = pd.factorize(df[feature])
+            hashes = np.array([murmurhash3_32(f"{feature}={hash_token(value)}", seed=0) for value in uniques], dtype='int64')
+
+            valid = codes >= 0
+            rows.append(np.flatnonzero(valid))
+            buckets.append((np.abs(hashes) % self.n_buckets)[codes[valid]])
+            signs.append(np.where(hashes < 0, -1.0, 1.0)[codes[valid]] if self.signed else np.ones(valid.sum()))
+
+        # entries that land in the same bucket of a row are summed
+        return sp.csr_matrix(
+            (np.concatenate([np.empty(0)] + signs), (np.concatenate([np.empty(0, dtype='int64')] + rows), np.concatenate([np.empty(0, dtype='int64')] + buckets))),
+            shape=(len(df), self.n_buckets),
         )
 
-        transformed_data = transformed_data.drop(columns=self.features).reset_index(drop=True)
-        transformed_data = pd.concat([transformed_data, encoded_df], axis=1)
-        return transformed_data
-    
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        '''
+        replaces the features with the hashed bucket columns
+
+        Parameters:
+        df (pd.DataFrame): The dataframe containing features to transform.
+
+        Returns:
+        pd.DataFrame: The dataframe with hashed features.
+        '''
+        return self.apply(df.copy(deep=False))
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        logger.info(f"Hashing {self.features} into {self.n_buckets} buckets")
+
+        encoded = self.encode(df)
+        if self.sparse:
+            encoded_df = pd.DataFrame.sparse.from_spmatrix(encoded, columns=self.bucket_columns())
+        else:
+            encoded_df = pd.DataFrame(encoded.toarray(), columns=self.bucket_columns())
+
+        df.drop(columns=self.features, inplace=True)
+        df.reset_index(drop=True, inplace=True)
+        return pd.concat([df, encoded_df], axis=1, copy=False)
+
+    def plan_columns(self, columns: list) -> list:
+        return [column for column in columns if column not in self.features] + self.bucket_columns()
+
+# target encoding
+class TargetEncoding(FeatureEngineeringStrategy, BaseEstimator, TransformerMixin):
+    def __init__(self, features: list, target: str = 'SalePrice', n_splits: int = 5, smoothing: float = 10.0, random_state: int = 42):
+        '''
+        initializes out-of-fold target encoding for categorical features
+
+        Every category becomes the smoothed mean target of its rows,
+        (sum + smoothing * prior) / (count + smoothing). On training data each row is encoded
+        with statistics of the other folds only, so a row never sees its own target.
+        In a scikit-learn pipeline fit_transform encodes out of fold with y and
+        transform encodes new data with the fitted mapping, so the mapping ships with the model.
+
+        parameters:
+        features (list): categorical features to encode, each is replaced by one float column
+        target (str): target column
+        n_splits (int): number of folds
+        smoothing (float): weight of the prior (the global mean) against the category mean
+        random_state (int): seed of the fold assignment
+        '''
+        self.features = features
+        self.target = target
+        self.n_splits = n_splits
+        self.smoothing = smoothing
+        self.random_state = random_state
+
+    def input_columns(self) -> list:
+        return list(self.features) + [self.target]
+
+    def _smoothed(self, sums, counts, prior):
+        return (sums + self.smoothing * prior) / (counts + self.smoothing)
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        '''
+        Encode the features: out of fold when the target is present, with the fitted mapping otherwise
+
+        parameters:
+        df (pd.DataFrame): data frame with the features (and the target for training)
+
+        return:
+        pd.DataFrame: data frame with the features replaced by their encodings
+        '''
+        return self.apply(df.copy(deep=False))
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        if self.target not in df.columns:
+            return self.encode(df)
+        return self._fit_encode(df, df[self.target].to_numpy(dtype='float64'))
+
+    def fit(self, X: pd.DataFrame, y=None) -> 'TargetEncoding':
+        '''
+        Fit the mapping on training data, y is the target (taken from X when None)
+        '''
+        self.fit_transform(X, y)
+        return self
+
+    def fit_transform(self, X: pd.DataFrame, y=None) -> pd.DataFrame:
+        '''
+        Fit the mapping and encode the training data out of fold
+
+        parameters:
+        X (pd.DataFrame): training data with the features
+        y (array-like): target aligned with the rows of X, taken from the target column of X when None
+
+        return:
+        pd.DataFrame: data frame with the features replaced by their out-of-fold encodings
+        '''
+        if y is None:
+            if self.target not in X.columns:
+                raise ValueError(f"TargetEncoding needs y or a '{self.target}' column to be fitted")
+            return self.transform(X)
+        return self._fit_encode(X.copy(deep=False), np.asarray(y, dtype='float64'))
+
+    def _fit_encode(self, df: pd.DataFrame, y: np.ndarray) -> pd.DataFrame:
+        logger.info(f"Applying {self.n_splits}-fold target encoding to {self.features}")
+
+        known = ~np.isnan(y)
+        y = np.where(known, y, 0.0)
+
+        # fold of every row, with the sum and count of the target per fold
+        folds = np.random.default_rng(self.random_state).permutation(len(df)) % self.n_splits
+        fold_sums = np.bincount(folds, weights=y, minlength=self.n_splits)
+        fold_counts = np.bincount(folds, weights=known, minlength=self.n_splits)
+        self.prior_ = y.sum() / max(known.sum(), 1)
+        # prior of each fold from the other folds only
+        oof_priors = (fold_sums.sum() - fold_sums) / np.maximum(fold_counts.sum() - fold_counts, 1)
+
+        self.mapping_ = {}
+        for feature in self.features:
+            codes, categories = pd.factorize(df[feature], use_na_sentinel=False)
+            n_categories = len(categories)
+
+            # sums and counts of every (fold, category) pair in one bincount
+            keys = folds * n_categories + codes
+            sums = np.bincount(keys, weights=y, minlength=self.n_splits * n_categories).reshape(self.n_splits, n_categories)
+            counts = np.bincount(keys, weights=known, minlength=self.n_splits * n_categories).reshape(self.n_splits, n_categories)
+
+            # statistics of the other folds are the totals minus the row's own fold
+            total_sums, total_counts = sums.sum(axis=0), counts.sum(axis=0)
+            oof = self._smoothed(total_sums - sums, total_counts - counts, oof_priors[:, None])
+            df[feature] = oof[folds, codes]
+
+            self.mapping_[feature] = pd.Series(self._smoothed(total_sums, total_counts, self.prior_), index=pd.Index(categories, dtype=object))
+
+        return df
+
+    def encode(self, df: pd.DataFrame) -> pd.DataFrame:
+        '''
+        Encode the features with the mapping fitted on the training data, unseen categories get the prior
+
+        parameters:
+        df (pd.DataFrame): data frame with the features
+
+        return:
+        pd.DataFrame: data frame with the features replaced by their encodings
+        '''
+        if not hasattr(self, 'mapping_'):
+            raise NotFittedError("TargetEncoding must be applied to data with the target (or loaded) before it can encode new data")
+
+        logger.info(f"Applying fitted target encoding to {self.features}")
+        df = df.copy(deep=False)
+        for feature in self.features:
+            mapping = self.mapping_[feature]
+            # None and NaN are the same missing category, the index only matches NaN
+            values = df[feature].astype(object)
+            positions = mapping.index.get_indexer(values.where(values.notna(), np.nan))
+            df[feature] = np.append(mapping.to_numpy(), self.prior_)[positions]
+        return df
+
+    def save(self, file_path: str):
+        '''
+        Serialize the fitted mapping and prior to json
+
+        parameters:
+        file_path (str): path of the json file
+        '''
+        if not hasattr(self, 'mapping_'):
+            raise NotFittedError("TargetEncoding must be fitted before it can be saved")
+
+        def category(value):
+            # json has no NaN, the missing category is written as null
+            if pd.isna(value):
+                return None
+            return value.item() if hasattr(value, 'item') else value
+
+        with open(file_path, 'w') as f:
+            json.dump(
+                {
+                    'features': list(self.features),
+                    'target': self.target,
+                    'n_splits': self.n_splits,
+                    'smoothing': self.smoothing,
+                    'random_state': self.random_state,
+                    'prior': float(self.prior_),
+                    'mapping': {
+                        feature: {'categories': [category(value) for value in mapping.index], 'values': mapping.tolist()}
+                        for feature, mapping in self.mapping_.items()
+                    },
+                },
+                f,
+            )
+
+    @classmethod
+    def load(cls, file_path: str) -> 'TargetEncoding':
+        '''
+        Restore a fitted encoding from json
+
+        parameters:
+        file_path (str): path of the json file written by save
+
+        return:
+        TargetEncoding: fitted encoding
+        '''
+        with open(file_path) as f:
+            state = json.load(f)
+
+        strategy = cls(
+            state['features'], target=state['target'], n_splits=state['n_splits'],
+            smoothing=state['smoothing'], random_state=state['random_state'],
+        )
+        strategy.prior_ = state['prior']
+        strategy.mapping_ = {
+            feature: pd.Series(
+                mapping['values'],
+                index=pd.Index([np.nan if value is None else value for value in mapping['categories']], dtype=object),
+                dtype='float64',
+            )
+            for feature, mapping in state['mapping'].items()
+        }
+        return strategy
+
+# row identifiers, numeric but meaningless as features
+IDENTIFIER_COLUMNS = ['Id']
+
+# pairwise interactions
+class InteractionFeatures(FeatureEngineeringStrategy):
+    def __init__(self, features: list = None, target: str = 'SalePrice', max_columns: int = 32, max_bytes: int = None, block_size: int = 64, exclude: list = None):
+        '''
+        initializes budgeted pairwise interaction features (e.g. OverallQual*GrLivArea)
+
+        Candidate pairs are screened with |corr(a, target) * corr(b, target)|, which costs one
+        correlation per column instead of one per pair. Only the best pairs within the budget
+        are generated, block by block into one preallocated float32 matrix.
+
+        parameters:
+        features (list): numeric candidate features, default is every dense numeric column except the target and exclude
+        target (str): target column used for screening
+        max_columns (int): maximum number of interaction columns
+        max_bytes (int): memory budget for the interaction matrix, lowers the number of columns if needed
+        block_size (int): number of products computed at once
+        exclude (list): columns never used as default candidates, default is IDENTIFIER_COLUMNS
+        '''
+        self.features = features
+        self.target = target
+        self.max_columns = max_columns
+        self.max_bytes = max_bytes
+        self.block_size = block_size
+        self.exclude = exclude
+
+    def input_columns(self) -> list:
+        return list(self.features or []) + [self.target]
+
+    def plan_columns(self, columns: list) -> list:
+        names = [f"{a}*{b}" for a, b in getattr(self, 'pairs_', [])]
+        return list(columns) + [name for name in names if name not in columns]
+
+    def budget(self, n_rows: int) -> int:
+        '''
+        Number of interaction columns allowed for a data frame with n_rows rows
+        '''
+        n_columns = self.max_columns if self.max_columns is not None else np.iinfo('int64').max
+        if self.max_bytes is not None:
+            n_columns = min(n_columns, self.max_bytes // max(4 * n_rows, 1))
+        return int(n_columns)
+
+    def select_pairs(self, df: pd.DataFrame) -> list:
+        '''
+        Pick the pairs with the highest screening score within the budget
+
+        parameters:
+        df (pd.DataFrame): training data with the candidate features and the target
+
+        return:
+        list: (feature, feature) pairs, best first
+        '''
+        features = self.features
+        if features is None:
+            exclude = set(IDENTIFIER_COLUMNS if self.exclude is None else self.exclude) | {self.target} | set(sparse_columns(df))
+            features = [column for column in df.select_dtypes(include='number').columns if column not in exclude]
+
+        correlations = df[features].corrwith(df[self.target]).fillna(0.0).to_numpy()
+        scores = np.abs(np.outer(correlations, correlations))
+        first, second = np.triu_indices(len(features), k=1)
+        scores = scores[first, second]
+
+        n_pairs = min(self.budget(len(df)), len(scores))
+        if n_pairs <= 0:
+            return []
+        best = np.argpartition(-scores, n_pairs - 1)[:n_pairs]
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return [(features[first[i]], features[second[i]]) for i in best]
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        '''
+        adds the interaction columns, pairs are selected when the target is present and reused otherwise
+
+        parameters:
+        df (pd.DataFrame): data frame with the candidate features
+
+        return:
+        pd.DataFrame: data frame with the interaction columns appended
+        '''
+        return self.apply(df.copy(deep=False))
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        if self.target in df.columns:
+            self.pairs_ = self.select_pairs(df)
+        elif not hasattr(self, 'pairs_'):
+            raise ValueError("InteractionFeatures must see the target once to select its pairs")
+
+        logger.info(f"Adding {len(self.pairs_)} interaction features")
+        if not self.pairs_:
+            return df
+
+        inputs = list(dict.fromkeys(feature for pair in self.pairs_ for feature in pair))
+        position = {feature: i for i, feature in enumerate(inputs)}
+        block = df[inputs].to_numpy(dtype='float32', na_value=np.nan)
+        first = np.array([position[a] for a, _ in self.pairs_])
+        second = np.array([position[b] for _, b in self.pairs_])
+
+        # only one block of products is alive next to the output at any time
+        interactions = np.empty((len(df), len(self.pairs_)), dtype='float32')
+        for start in range(0, len(self.pairs_), self.block_size):
+            stop = start + self.block_size
+            np.multiply(block[:, first[start:stop]], block[:, second[start:stop]], out=interactions[:, start:stop])
+
+        names = [f"{a}*{b}" for a, b in self.pairs_]
+        existing = [name for name in names if name in df.columns]
+        if existing:
+            df.drop(columns=existing, inplace=True)
+        return pd.concat([df, pd.DataFrame(interactions, columns=names, index=df.index, copy=False)], axis=1, copy=False)
+
+# derived features
+class DerivedFeature:
+    def __init__(self, name: str, weights: dict = None, inputs: list = None, expression=None):
+        '''
+        Declaration of one derived column
+
+        Linear features are given as weights over input columns and are batched with
+        every other linear feature into one matrix product. Anything else is given as an
+        expression that receives the input columns as NumPy arrays.
+
+        parameters:
+        name (str): name of the derived column
+        weights (dict): input column -> weight, for features that are weighted sums
+        inputs (list): input columns of the expression
+        expression (callable): vectorized function of the input arrays, in the order of inputs
+        '''
+        self.name = name
+        self.weights = weights
+        self.inputs = list(weights) if weights is not None else list(inputs)
+        self.expression = expression
+
+HOUSING_FEATURES = [
+    DerivedFeature('TotalSF', {'TotalBsmtSF': 1, '1stFlrSF': 1, '2ndFlrSF': 1}),
+    DerivedFeature('HouseAge', {'YrSold': 1, 'YearBuilt': -1}),
+    DerivedFeature('YearsSinceRemodel', {'YrSold': 1, 'YearRemodAdd': -1}),
+    DerivedFeature('TotalBathrooms', {'FullBath': 1, 'HalfBath': 0.5, 'BsmtFullBath': 1, 'BsmtHalfBath': 0.5}),
+    DerivedFeature('TotalPorchSF', {'OpenPorchSF': 1, 'EnclosedPorch': 1, '3SsnPorch': 1, 'ScreenPorch': 1}),
+]
+
+class DerivedFeatures(FeatureEngineeringStrategy):
+    def __init__(self, derived: list = None):
+        '''
+        initializes the derived features to add
+
+        parameters:
+        derived (list): DerivedFeature declarations or names from HOUSING_FEATURES, default is all of HOUSING_FEATURES
+        '''
+        library = {feature.name: feature for feature in HOUSING_FEATURES}
+        self.derived = [library[feature] if isinstance(feature, str) else feature for feature in (derived or HOUSING_FEATURES)]
+
+    def input_columns(self) -> list:
+        return list(dict.fromkeys(column for feature in self.derived for column in feature.inputs))
+
+    def plan_columns(self, columns: list) -> list:
+        names = [feature.name for feature in self.derived]
+        return [column for column in columns if column not in names] + names
+
+    def evaluate(self, df: pd.DataFrame) -> np.ndarray:
+        '''
+        Compute every derived column in one pass over the input columns
+
+        parameters:
+        df (pd.DataFrame): data frame containing the input columns
+
+        return:
+        np.ndarray: (rows x derived features) array, NaN where an input is missing
+        '''
+        inputs = self.input_columns()
+        position = {column: i for i, column in enumerate(inputs)}
+        block = df[inputs].to_numpy(dtype='float64', na_value=np.nan)
+        values = np.empty((len(df), len(self.derived)))
+
+        linear = [i for i, feature in enumerate(self.derived) if feature.weights is not None]
+        if linear:
+            weights = np.zeros((len(inputs), len(linear)))
+            for j, i in enumerate(linear):
+                for column, weight in self.derived[i].weights.items():
+                    weights[position[column], j] = weight
+
+            # NaN * 0 is NaN, so missing inputs are zeroed and tracked separately
+            missing = np.isnan(block)
+            sums = np.where(missing, 0.0, block) @ weights
+            values[:, linear] = np.where(missing.astype('float64') @ (weights != 0) > 0, np.nan, sums)
+
+        for i, feature in enumerate(self.derived):
+            if feature.weights is None:
+                values[:, i] = feature.expression(*(block[:, position[column]] for column in feature.inputs))
+
+        return values
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        '''
+        adds the derived columns to the data frame
+
+        parameters:
+        df (pd.DataFrame): data frame containing the input columns
+
+        return:
+        pd.DataFrame: data frame with the derived columns appended (replaced if already present)
+        '''
+        return self.apply(df.copy(deep=False))
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        names = [feature.name for feature in self.derived]
+        logger.info(f"Adding derived features: {names}")
+
+        values = self.evaluate(df)
+
+        existing = [name for name in names if name in df.columns]
+        if existing:
+            df.drop(columns=existing, inplace=True)
+        return pd.concat([df, pd.DataFrame(values, columns=names, index=df.index)], axis=1, copy=False)
+
+class CompositeFeatureEngineering(FeatureEngineeringStrategy):
+    def __init__(self, strategies: list):
+        '''
+        Run an ordered list of strategies over a single working copy of the data frame
+
+        Every strategy replaces the columns it touches in the working frame, so the
+        input is copied once (shallowly) instead of once per strategy.
+
+        parameters:
+        strategies (list): strategies applied in the given order
+        '''
+        self.strategies = strategies
+
+    def plan(self, columns: list) -> list:
+        '''
+        Check which columns every strategy touches before any work is done
+
+        parameters:
+        columns (list): columns of the input data frame
+
+        return:
+        list: (strategy name, columns it reads) in execution order
+        '''
+        steps = []
+        for strategy in self.strategies:
+            inputs = strategy.input_columns()
+            missing = [column for column in inputs if column not in columns]
+            if missing:
+                raise ValueError(f"{type(strategy).__name__} needs columns {missing} that are not available at its stage")
+            steps.append((type(strategy).__name__, inputs))
+            columns = strategy.plan_columns(columns)
+        return steps
+
+    def input_columns(self) -> list:
+        return list(dict.fromkeys(column for strategy in self.strategies for column in strategy.input_columns()))
+
+    def plan_columns(self, columns: list) -> list:
+        for strategy in self.strategies:
+            columns = strategy.plan_columns(columns)
+        return columns
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        '''
+        Apply all strategies in order, the input frame is left untouched
+
+        parameters:
+        df (pd.DataFrame): data frame that need feature engineering
+
+        return:
+        pd.DataFrame: data frame after every strategy
+        '''
+        return self.apply(df.copy(deep=False))
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        for name, columns in self.plan(list(df.columns)):
+            logger.info(f"Planned {name} on {columns}")
+
+        for strategy in self.strategies:
+            df = strategy.apply(df)
+        return df
+
+class FeatureGraph:
+    def __init__(self, derived: list = None):
+        '''
+        Declarative graph of derived features over raw columns
+
+        Every derived feature names its inputs, which are raw columns or other derived
+        features. Given the features a model consumes, the graph resolves which raw
+        columns have to be loaded and which features have to be computed, nothing else.
+
+        parameters:
+        derived (list): DerivedFeature declarations, default is HOUSING_FEATURES
+        '''
+        self.derived = {feature.name: feature for feature in (derived or HOUSING_FEATURES)}
+
+    def resolve(self, outputs: list) -> tuple:
+        '''
+        Walk the graph back from the outputs
+
+        parameters:
+        outputs (list): features the model consumes, raw or derived
+
+        return:
+        tuple: (raw columns to load, levels of derived features), a level only depends on raw columns and earlier levels
+        '''
+        raw, depth = {}, {}
+
+        def visit(name, path):
+            if name in depth:
+                return depth[name]
+            if name not in self.derived:
+                raw[name] = None
+                return 0
+            if name in path:
+                raise ValueError(f"Derived feature {name} depends on itself")
+            depth[name] = 1 + max(visit(column, path | {name}) for column in self.derived[name].inputs)
+            return depth[name]
+
+        for name in outputs:
+            visit(name, frozenset())
+
+        levels = [[] for _ in range(max(depth.values(), default=0))]
+        for name, level in depth.items():
+            levels[level - 1].append(self.derived[name])
+        return list(raw), levels
+
+    def required_columns(self, outputs: list) -> list:
+        '''
+        Raw columns that have to be loaded to compute the outputs, e.g. for load_file(columns=...)
+        '''
+        return self.resolve(outputs)[0]
+
+    def plan(self, outputs: list, strategies: list = ()) -> CompositeFeatureEngineering:
+        '''
+        Build the feature engineering that computes only what the outputs need
+
+        Derived features are computed first, level by level. The strategies then run in
+        order, limited to the features reachable from the outputs; strategies left without
+        features are skipped.
+
+        parameters:
+        outputs (list): features the model consumes
+        strategies (list): feature engineering strategies to apply after the derived features
+
+        return:
+        CompositeFeatureEngineering: strategies to run over the projected data frame
+        '''
+        raw, levels = self.resolve(outputs)
+        reachable = set(raw) | {feature.name for level in levels for feature in level}
+
+        planned = [DerivedFeatures(level) for level in levels]
+        for strategy in strategies:
+            features = getattr(strategy, 'features', None)
+            if features is None:
+                planned.append(strategy)
+                continue
+
+            needed = [feature for feature in features if feature in reachable]
+            if not needed:
+                logger.info(f"Skipping {type(strategy).__name__}, none of {features} is reachable from the outputs")
+                continue
+            if len(needed) < len(features):
+                strategy = copy.deepcopy(strategy)
+                strategy.features = needed
+            planned.append(strategy)
+
+        return CompositeFeatureEngineering(planned)
+
 class FeatureEngineer:
-    def __init__(self, strategy: FeatureEngineeringStrategy):
+    def __init__(self, strategy):
         '''
         initialize feature engineering strategy
 
         parameters:
-        strategy (FeatureEngineeringStrategy): strategy to use in feature engineering
+        strategy (FeatureEngineeringStrategy or list): strategy to use in feature engineering,
+            a list of strategies is run in order over one working copy
         '''
-        self.strategy = strategy
+        self.set_strategy(strategy)
     
-    def set_strategy(self, strategy:FeatureEngineeringStrategy):
+    def set_strategy(self, strategy):
         '''
         set specific strategy to use
 
         parameters:
-        strategy (FeatureEngineeringStrategy): new strategy to use in feature engineering
+        strategy (FeatureEngineeringStrategy or list): new strategy to use in feature engineering
         '''
+        if isinstance(strategy, (list, tuple)):
+            strategy = CompositeFeatureEngineering(list(strategy))
         self.strategy = strategy
     
     def apply_feature_engineering(self, df: pd.DataFrame) -> pd.DataFrame:
@@ -1,11 +1,124 @@
 from abc import ABC, abstractmethod
+from typing import Iterable, Union
+import json
+import warnings
+from numbers import Number
+import numpy as np
 import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.exceptions import NotFittedError
+from src.streaming_statistics import RunningMoments, QuantileSketch, HeavyHitters
 
 import logging
 
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 logger = logging.getLogger(__name__)
 
+def column_modes(block: np.ndarray) -> np.ndarray:
+    '''
+    Most frequent value of every column of a float block in one sort, ignoring NaN
+
+    Ties go to the smallest value (like pandas' mode().iloc[0]); all-NaN columns give NaN.
+
+    parameters:
+    block (np.ndarray): 2-D float array, one column per feature
+
+    return:
+    np.ndarray: mode of every column
+    '''
+    n_rows, n_columns = block.shape
+    if n_rows == 0:
+        return np.full(n_columns, np.nan)
+
+    ordered = np.sort(block, axis=0)
+
+    # runs of equal values, numbered per column and offset to be unique across columns
+    starts = np.ones(ordered.shape, dtype=bool)
+    starts[1:] = ordered[1:] != ordered[:-1]
+    run_ids = np.cumsum(starts, axis=0) - 1
+
+    counts = np.bincount(
+        (run_ids + np.arange(n_columns) * n_rows).ravel(),
+        weights=~np.isnan(ordered).ravel(),
+        minlength=n_rows * n_columns,
+    ).reshape(n_columns, n_rows)
+
+    best_run = counts.argmax(axis=1)
+    first_row = (run_ids == best_run).argmax(axis=0)
+
+    modes = ordered[first_row, np.arange(n_columns)]
+    modes[counts.max(axis=1) == 0] = np.nan
+    return modes
+
+def compute_fill_values(df: pd.DataFrame, method: str, fill_value=None, categorical: bool = False) -> dict:
+    '''
+    Fill value of every numeric (and optionally categorical) column, computed over column blocks
+
+    All numeric columns are reduced together as one float block; categorical columns
+    are reduced together as one block of category codes.
+
+    parameters:
+    df (pd.DataFrame): training data
+    method (str): mean, median, mode or constant
+    fill_value (any): value used by the constant method
+    categorical (bool): also compute fill values for object and category columns
+
+    return:
+    dict: column -> fill value, columns without a value (e.g. all missing) are left out
+    '''
+    fill_values = {}
+
+    # sparse columns (e.g. a sparse one-hot block) have no gaps and would be densified here
+    numeric_columns = pd.Index(
+        [column for column, dtype in df.select_dtypes(include='number').dtypes.items() if not isinstance(dtype, pd.SparseDtype)]
+    )
+    if len(numeric_columns) > 0:
+        block = df[numeric_columns].to_numpy(dtype='float64', na_value=np.nan)
+
+        with warnings.catch_warnings():
+            # all-NaN columns warn and give NaN, they are dropped below
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            if method == 'mean':
+                values = np.nanmean(block, axis=0)
+            elif method == 'median':
+                values = np.nanmedian(block, axis=0)
+            elif method == 'mode':
+                values = column_modes(block)
+            elif method == 'constant' and isinstance(fill_value, Number):
+                values = np.full(len(numeric_columns), fill_value, dtype='float64')
+            else:
+                values = np.full(len(numeric_columns), np.nan)
+
+        fill_values.update(
+            (column, value.item()) for column, value in zip(numeric_columns, values) if not np.isnan(value)
+        )
+
+    if categorical and method in ('mean', 'median', 'mode', 'constant'):
+        categorical_columns = df.select_dtypes(include=['object', 'category']).columns
+
+        if method == 'constant':
+            if fill_value is not None:
+                fill_values.update((column, fill_value) for column in categorical_columns)
+
+        elif len(categorical_columns) > 0:
+            # the mode of the category codes is the mode of the column
+            uniques, codes = [], np.empty((len(df), len(categorical_columns)), dtype='float64')
+            for i, column in enumerate(categorical_columns):
+                if isinstance(df[column].dtype, pd.CategoricalDtype):
+                    column_codes, column_uniques = df[column].cat.codes.to_numpy(), df[column].cat.categories
+                else:
+                    column_codes, column_uniques = pd.factorize(df[column])
+                codes[:, i] = column_codes
+                uniques.append(column_uniques)
+
+            codes[codes < 0] = np.nan
+            for column, column_uniques, code in zip(categorical_columns, uniques, column_modes(codes)):
+                if not np.isnan(code):
+                    value = column_uniques[int(code)]
+                    fill_values[column] = value.item() if hasattr(value, 'item') else value
+
+    return fill_values
+
 # Base class
 class MissingValueHandlingStrategy(ABC):
     @abstractmethod
@@ -21,6 +134,31 @@ class MissingValueHandlingStrategy(ABC):
         '''
         pass
 
+    def fit(self, df: pd.DataFrame, y=None) -> 'MissingValueHandlingStrategy':
+        '''
+        Learn whatever the strategy needs from training data, stateless strategies learn nothing
+
+        parameters:
+        df (pd.DataFrame): training data
+        y (any): ignored, present for scikit-learn pipelines
+
+        return:
+        the strategy itself
+        '''
+        return self
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        '''
+        Handle missing values with what was learned in fit
+
+        parameters:
+        df (pd.DataFrame): data frame with missing values
+
+        return:
+        data frame after handling missing values
+        '''
+        return self.handle(df)
+
 # concrete classes
 class DropMissingValues(MissingValueHandlingStrategy):
     def __init__(self, axis=0, thresh=None):
@@ -49,18 +187,97 @@ class DropMissingValues(MissingValueHandlingStrategy):
         logging.info("Missing values dropped")
         return df_cleaned
 
-class FillMisssingValue(MissingValueHandlingStrategy):
-    def __init__(self, method='mean', fill_value=None):
+class FillMisssingValue(MissingValueHandlingStrategy, BaseEstimator, TransformerMixin):
+    def __init__(self, method='mean', fill_value=None, categorical=False):
         '''
         Initializing missing value strategy with sepcific method
 
         parameters:
         method (str): which method to use - mean, median, mode or constant
         fill_value (any): constant value to fill in
+        categorical (bool): also fill object and category columns (with their mode, or fill_value for constant)
         '''
         self.method = method
         self.fill_value = fill_value
-    
+        self.categorical = categorical
+
+    def fit(self, df: pd.DataFrame, y=None) -> 'FillMisssingValue':
+        '''
+        Compute the fill value of every column in one vectorized pass per column block
+
+        parameters:
+        df (pd.DataFrame): training data
+        y (any): ignored, present for scikit-learn pipelines
+
+        return:
+        the fitted strategy, fill values are stored in fill_values_
+        '''
+        logging.info(f"fitting fill values using {self.method}")
+
+        if self.method not in ('mean', 'median', 'mode', 'constant'):
+            logging.warning(f"Unknown method {self.method}. No Missing value handled")
+
+        self.fill_values_ = compute_fill_values(
+            df, self.method, fill_value=self.fill_value, categorical=self.categorical
+        )
+        return self
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        '''
+        Fill missing values with the fitted values, no statistics are computed here
+
+        Numeric columns are filled together as one block per dtype and only
+        columns that contained missing values replace the originals.
+
+        paramters:
+        df (pd.DataFrame): Data frame with missing value
+
+        return:
+        Data frame with replaced missing vlaues
+        '''
+        if not hasattr(self, 'fill_values_'):
+            raise NotFittedError("FillMisssingValue must be fitted (or loaded) before transform")
+
+        # columns that are not reassigned stay shared with df
+        df_cleaned = df.copy(deep=False)
+
+        columns = pd.Index([column for column in self.fill_values_ if column in df_cleaned.columns])
+        dtypes = df_cleaned.dtypes[columns]
+        # nullable extension dtypes (Int64, Float64, ...) have no numpy block, they go through fillna
+        is_numeric = np.array([isinstance(dtype, np.dtype) and pd.api.types.is_numeric_dtype(dtype) for dtype in dtypes], dtype=bool)
+
+        # one block per numeric dtype: filled in place, only columns that had gaps are swapped in
+        numeric_columns = columns[is_numeric]
+        for _, group in pd.Series(numeric_columns, index=numeric_columns).groupby(dtypes[numeric_columns].astype(str)):
+            group = group.index
+            dtype = dtypes[group[0]]
+            block = df_cleaned[group].to_numpy(dtype=dtype, copy=True)
+            missing = np.isnan(block) if block.dtype.kind == 'f' else np.zeros(block.shape, dtype=bool)
+            has_missing = missing.any(axis=0)
+            if not has_missing.any():
+                continue
+
+            fills = np.array([self.fill_values_[column] for column in group], dtype=dtype)
+            np.copyto(block, np.broadcast_to(fills, block.shape), where=missing)
+            # isetitem swaps in the new arrays positionally and never writes into df
+            df_cleaned.isetitem(
+                df_cleaned.columns.get_indexer(group[has_missing]).tolist(), block[:, has_missing]
+            )
+
+        for column in columns[~is_numeric]:
+            series, value = df_cleaned[column], self.fill_values_[column]
+            if not series.hasnans:
+                continue
+            if isinstance(series.dtype, pd.CategoricalDtype) and value not in series.cat.categories:
+                series = series.cat.add_categories([value])
+            if pd.api.types.is_integer_dtype(series.dtype) and float(value) != int(value):
+                # a fractional fill (e.g. a mean) does not fit a nullable integer column
+                series = series.astype('Float64')
+            df_cleaned[column] = series.fillna(value)
+
+        logging.info("Missing values handled")
+        return df_cleaned
+
     def handle(self, df: pd.DataFrame) -> pd.DataFrame:
         '''
         Impute missing value with mean, median, mode or any other value
@@ -72,36 +289,345 @@ class FillMisssingValue(MissingValueHandlingStrategy):
         Data frame with replaced missing vlaues
         '''
         logging.info(f"filling missing values using {self.method}")
+        return self.fit(df).transform(df)
 
-        df_cleaned = df.copy()
-        numeric_columns = df_cleaned.select_dtypes(include='number').columns
+    def save(self, file_path: str):
+        '''
+        Serialize the fitted fill values to json
 
-        if self.method == 'mean':
-            df_cleaned[numeric_columns] = df_cleaned[numeric_columns].fillna(
-                df[numeric_columns].mean()
+        parameters:
+        file_path (str): path of the json file
+        '''
+        if not hasattr(self, 'fill_values_'):
+            raise NotFittedError("FillMisssingValue must be fitted before it can be saved")
+
+        with open(file_path, 'w') as f:
+            json.dump(
+                {
+                    'method': self.method,
+                    'fill_value': self.fill_value,
+                    'categorical': self.categorical,
+                    'fill_values': self.fill_values_,
+                },
+                f,
             )
-        
+
+    @classmethod
+    def load(cls, file_path: str) -> 'FillMisssingValue':
+        '''
+        Restore a fitted strategy from json
+
+        parameters:
+        file_path (str): path of the json file written by save
+
+        return:
+        FillMisssingValue: fitted strategy
+        '''
+        with open(file_path) as f:
+            state = json.load(f)
+
+        strategy = cls(
+            method=state['method'], fill_value=state['fill_value'], categorical=state.get('categorical', False)
+        )
+        strategy.fill_values_ = state['fill_values']
+        return strategy
+
+
+class StreamingFillMissingValue(FillMisssingValue):
+    def __init__(self, method='mean', fill_value=None, categorical=False, sketch_size=200, heavy_hitters=64):
+        '''
+        Fill missing values with statistics gathered chunk by chunk in bounded memory
+
+        The mean comes from running moments, the median from a quantile sketch
+        and the mode from a bounded frequent-items counter, so data that does not fit
+        into memory can be fitted and summaries of several workers can be merged.
+
+        The mean is exact, the median and mode are approximate: the median is a value
+        whose rank is within about 2.5 / sketch_size of the middle (1.25% for the default
+        200, the bound QuantileSketch.from_error sizes for), and the mode is only found
+        for values seen in more than count / (heavy_hitters + 1) rows. Columns without
+        such a value (e.g. Id, where every value is unique) are left unfilled and logged.
+
+        parameters:
+        method (str): which method to use - mean, median, mode or constant
+        fill_value (any): constant value to fill in
+        categorical (bool): also fill object and category columns (with their most frequent value, or fill_value for constant)
+        sketch_size (int): size of the median sketch, the rank error stays below roughly 2.5 / sketch_size
+        heavy_hitters (int): number of values tracked per column for the mode
+        '''
+        super().__init__(method=method, fill_value=fill_value, categorical=categorical)
+        self.sketch_size = sketch_size
+        self.heavy_hitters = heavy_hitters
+
+    def _reset(self):
+        self.numeric_columns_ = None
+        self.categorical_columns_ = None
+        self.moments_ = RunningMoments()
+        self.sketches_ = {}
+        self.counters_ = {}
+
+    def partial_fit(self, df: pd.DataFrame, y=None) -> 'StreamingFillMissingValue':
+        '''
+        Add one chunk of training data to the running statistics
+
+        The first chunk fixes which columns are numeric and categorical.
+
+        parameters:
+        df (pd.DataFrame): chunk of training data
+        y (any): ignored, present for scikit-learn pipelines
+
+        return:
+        the strategy with updated statistics, call finalize to compute the fill values
+        '''
+        if getattr(self, 'numeric_columns_', None) is None:
+            self._reset()
+            self.numeric_columns_ = df.select_dtypes(include='number').columns
+            self.categorical_columns_ = (
+                df.select_dtypes(include=['object', 'category']).columns if self.categorical else pd.Index([])
+            )
+
+        if self.method == 'mean':
+            self.moments_.update(df[self.numeric_columns_])
         elif self.method == 'median':
-           df_cleaned[numeric_columns] = df_cleaned[numeric_columns].fillna(
-               df[numeric_columns].median()
-           )
-        
+            for column in self.numeric_columns_:
+                self.sketches_.setdefault(column, QuantileSketch(k=self.sketch_size)).update(df[column])
         elif self.method == 'mode':
-            for column in numeric_columns:
-                df_cleaned[column].fillna(
-                    df[column].mode().iloc(0),
-                    inplace=True
-                )
-        
+            for column in self.numeric_columns_:
+                self.counters_.setdefault(column, HeavyHitters(self.heavy_hitters)).update(df[column])
+
+        if self.method in ('mean', 'median', 'mode'):
+            for column in self.categorical_columns_:
+                self.counters_.setdefault(column, HeavyHitters(self.heavy_hitters)).update(df[column])
+        return self
+
+    def merge(self, other: 'StreamingFillMissingValue') -> 'StreamingFillMissingValue':
+        '''
+        Combine with the statistics another worker gathered over other chunks
+
+        parameters:
+        other (StreamingFillMissingValue): strategy with the same method, partially fitted on other rows
+
+        return:
+        the merged strategy, call finalize to compute the fill values
+        '''
+        if getattr(other, 'numeric_columns_', None) is None:
+            return self
+        if getattr(self, 'numeric_columns_', None) is None:
+            self._reset()
+            self.numeric_columns_, self.categorical_columns_ = other.numeric_columns_, other.categorical_columns_
+
+        self.moments_.merge(other.moments_)
+        for column, sketch in other.sketches_.items():
+            self.sketches_.setdefault(column, QuantileSketch(k=self.sketch_size)).merge(sketch)
+        for column, counter in other.counters_.items():
+            self.counters_.setdefault(column, HeavyHitters(self.heavy_hitters)).merge(counter)
+        return self
+
+    def finalize(self) -> 'StreamingFillMissingValue':
+        '''
+        Turn the gathered statistics into fill values
+
+        return:
+        the fitted strategy, fill values are stored in fill_values_
+        '''
+        if getattr(self, 'numeric_columns_', None) is None:
+            raise NotFittedError("StreamingFillMissingValue has not seen any data")
+
+        values = {}
+        if self.method == 'mean' and self.moments_.count is not None:
+            values.update(self.moments_.mean_series().items())
+        elif self.method == 'median':
+            values.update((column, sketch.quantile(0.5)) for column, sketch in self.sketches_.items())
         elif self.method == 'constant':
-            df_cleaned[numeric_columns].fillna(value=self.fill_value)
-        
-        else:
+            if isinstance(self.fill_value, Number):
+                values.update((column, self.fill_value) for column in self.numeric_columns_)
+            if self.fill_value is not None:
+                values.update((column, self.fill_value) for column in self.categorical_columns_)
+
+        values.update((column, counter.most_common()) for column, counter in self.counters_.items())
+
+        # same layout as FillMisssingValue: plain python values, columns without a value left out
+        self.fill_values_ = {
+            column: value.item() if hasattr(value, 'item') else value
+            for column, value in values.items()
+            if value is not None and not (isinstance(value, Number) and np.isnan(value))
+        }
+
+        # columns with values but none frequent enough, all-missing columns are left out like in FillMisssingValue
+        skipped = [column for column, counter in self.counters_.items() if counter.count and column not in self.fill_values_]
+        if skipped:
+            logging.warning(
+                f"No value is frequent enough to be kept by the mode counter (heavy_hitters={self.heavy_hitters}), "
+                f"columns left unfilled: {skipped}"
+            )
+        return self
+
+    def fit(self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]], y=None) -> 'StreamingFillMissingValue':
+        '''
+        Compute the fill values over a data frame or an iterable of chunks (e.g. ChunkedDataSource)
+
+        parameters:
+        data (pd.DataFrame or Iterable[pd.DataFrame]): training data
+        y (any): ignored, present for scikit-learn pipelines
+
+        return:
+        the fitted strategy, fill values are stored in fill_values_
+        '''
+        logging.info(f"fitting fill values using streaming {self.method}")
+
+        if self.method not in ('mean', 'median', 'mode', 'constant'):
             logging.warning(f"Unknown method {self.method}. No Missing value handled")
-        
-        logging.info("Missing values handled")
+
+        self.numeric_columns_ = None
+        for chunk in ([data] if isinstance(data, pd.DataFrame) else data):
+            self.partial_fit(chunk)
+        return self.finalize()
+
+
+class GroupFillMissingValue(MissingValueHandlingStrategy, BaseEstimator, TransformerMixin):
+    def __init__(self, group_by='Neighborhood', method='median', columns=None):
+        '''
+        Fill missing numeric values with a statistic of the row's group (e.g. LotFrontage by Neighborhood)
+
+        parameters:
+        group_by (str): column whose values define the groups, such as Neighborhood or MSSubClass
+        method (str): which statistic to use per group - mean or median
+        columns (list): numeric columns to fill, default is every numeric column except group_by
+        '''
+        self.group_by = group_by
+        self.method = method
+        self.columns = columns
+
+    def fit(self, df: pd.DataFrame, y=None) -> 'GroupFillMissingValue':
+        '''
+        Compute the statistic of every group and column in one groupby, plus global fallbacks
+
+        parameters:
+        df (pd.DataFrame): training data
+        y (any): ignored, present for scikit-learn pipelines
+
+        return:
+        the fitted strategy, the lookup table is stored in group_values_ and the fallbacks in fill_values_
+        '''
+        logging.info(f"fitting {self.method} fill values grouped by {self.group_by}")
+
+        columns = df.select_dtypes(include='number').columns if self.columns is None else pd.Index(self.columns)
+        self.columns_ = [column for column in columns if column != self.group_by]
+
+        if self.method not in ('mean', 'median'):
+            # nothing to aggregate, transform returns the data unchanged
+            logging.warning(f"Unknown method {self.method}. No Missing value handled")
+            self.columns_ = []
+            self.fill_values_ = {}
+            self.groups_ = []
+            self.group_values_ = np.empty((0, 0), dtype='float64')
+            return self
+
+        self.fill_values_ = compute_fill_values(df[self.columns_], self.method)
+        # group statistics that are missing (a group without any value) fall back to the global value
+        group_values = (
+            df.groupby(self.group_by, observed=True, dropna=True)[self.columns_]
+            .agg(self.method)
+            .astype('float64')
+            .fillna(pd.Series(self.fill_values_, dtype='float64'))
+        )
+        self.groups_ = group_values.index.astype(object).tolist()
+        self.group_values_ = group_values.to_numpy()
+        return self
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        '''
+        Fill missing values from the fitted lookup table, unseen or missing groups get the global value
+
+        parameters:
+        df (pd.DataFrame): data frame with missing values and the group_by column
+
+        return:
+        data frame with replaced missing values
+        '''
+        if not hasattr(self, 'group_values_'):
+            raise NotFittedError("GroupFillMissingValue must be fitted (or loaded) before transform")
+
+        df_cleaned = df.copy(deep=False)
+        columns = [column for column in self.columns_ if column in df_cleaned.columns]
+        if not columns:
+            return df_cleaned
+
+        # the last row of the table holds the global values, get_indexer maps unseen groups to it (-1)
+        positions = [self.columns_.index(column) for column in columns]
+        fallback = np.array([self.fill_values_.get(column, np.nan) for column in columns], dtype='float64')
+        table = np.vstack([self.group_values_[:, positions], fallback])
+        rows = pd.Index(self.groups_, dtype=object).get_indexer(df_cleaned[self.group_by].astype(object))
+
+        block = df_cleaned[columns].to_numpy(dtype='float64', na_value=np.nan)
+        missing = np.isnan(block)
+        has_missing = missing.any(axis=0)
+        np.copyto(block, table[rows], where=missing)
+
+        for i in np.flatnonzero(has_missing):
+            column = columns[i]
+            df_cleaned.isetitem(df_cleaned.columns.get_loc(column), block[:, i].astype(df_cleaned[column].dtype))
+
+        logging.info(f"Missing values filled by {self.group_by} {self.method}")
         return df_cleaned
 
+    def handle(self, df: pd.DataFrame) -> pd.DataFrame:
+        '''
+        Impute missing values with the statistic of each row's group
+
+        parameters:
+        df (pd.DataFrame): data frame with missing values
+
+        return:
+        data frame with replaced missing values
+        '''
+        return self.fit(df).transform(df)
+
+    def save(self, file_path: str):
+        '''
+        Serialize the fitted lookup table to json
+
+        parameters:
+        file_path (str): path of the json file
+        '''
+        if not hasattr(self, 'group_values_'):
+            raise NotFittedError("GroupFillMissingValue must be fitted before it can be saved")
+
+        with open(file_path, 'w') as f:
+            json.dump(
+                {
+                    'group_by': self.group_by,
+                    'method': self.method,
+                    'columns': self.columns_,
+                    'groups': [group.item() if hasattr(group, 'item') else group for group in self.groups_],
+                    # json has no NaN, missing statistics are written as null
+                    'group_values': np.where(np.isnan(self.group_values_), None, self.group_values_).tolist(),
+                    'fill_values': self.fill_values_,
+                },
+                f,
+            )
+
+    @classmethod
+    def load(cls, file_path: str) -> 'GroupFillMissingValue':
+        '''
+        Restore a fitted strategy from json
+
+        parameters:
+        file_path (str): path of the json file written by save
+
+        return:
+        GroupFillMissingValue: fitted strategy
+        '''
+        with open(file_path) as f:
+            state = json.load(f)
+
+        strategy = cls(group_by=state['group_by'], method=state['method'], columns=state['columns'])
+        strategy.columns_ = state['columns']
+        strategy.groups_ = state['groups']
+        strategy.group_values_ = np.array(state['group_values'], dtype='float64').reshape(len(state['groups']), len(state['columns']))
+        strategy.fill_values_ = state['fill_values']
+        return strategy
+
 
 # context class
 class MissingValueHandler:
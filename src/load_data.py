@@ -1,57 +1,842 @@
+import io
+import os
+import copy
+import glob
+import json
 import zipfile
 from abc import ABC, abstractmethod
+from fnmatch import fnmatch
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import IO, Iterable, Iterator, List, Optional, Union
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals, is_numeric_dtype, is_bool_dtype
 import logging
 
+from src.data_cache import DatasetCache
+
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 logger = logging.getLogger(__name__)
 
+# rows read up front to estimate the in-memory size of a row for byte-bounded chunks
+PROBE_ROWS = 1000
+
+# characters read from a json file per refill of the incremental decoder
+JSON_READ_SIZE = 1024 * 1024
+
+DESCRIPTION_PATH = './data/raw/data_description.txt'
+
+# strings read_csv treats as missing by default, json values get the same treatment
+NA_STRINGS = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+]
+
+# codes spelled differently in the data files than in data_description.txt
+CODE_VARIANTS = {
+    'MSZoning': ['C (all)'],
+    'Neighborhood': ['NAmes'],
+    'BldgType': ['2fmCon', 'Duplex', 'Twnhs'],
+    'Exterior2nd': ['Brk Cmn', 'CmentBd', 'Wd Shng'],
+}
+
+def rows_per_chunk(sample: pd.DataFrame, chunk_bytes: int) -> int:
+    '''
+    Estimate how many rows fit into a chunk of the given in-memory size
+
+    parameters:
+    sample (pd.DataFrame): rows already read from the source
+    chunk_bytes (int): upper bound for the memory of one chunk
+
+    return:
+    int: number of rows per chunk (at least 1)
+    '''
+    if len(sample) == 0:
+        return PROBE_ROWS
+
+    row_bytes = sample.memory_usage(index=False, deep=True).sum() / len(sample)
+    return max(1, int(chunk_bytes // max(row_bytes, 1)))
+
+def split_frame(df: pd.DataFrame, chunksize: int) -> Iterator[pd.DataFrame]:
+    '''
+    Yield consecutive row slices of a data frame
+
+    parameters:
+    df (pd.DataFrame): data frame to slice
+    chunksize (int): rows per slice
+    '''
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+def open_text(file_path: Union[str, IO]) -> IO:
+    '''
+    Open a path or wrap a binary file object for reading text
+
+    parameters:
+    file_path (str or file object): path to the file or an open file
+
+    return:
+    text file object
+    '''
+    if isinstance(file_path, str):
+        return open(file_path, encoding='utf-8')
+    if isinstance(file_path, io.TextIOBase):
+        return file_path
+    return io.TextIOWrapper(file_path, encoding='utf-8')
+
+def iter_json_records(file_path: Union[str, IO]) -> Iterator[dict]:
+    '''
+    Decode records one at a time from a top-level JSON array or from newline delimited JSON
+
+    Only the current read block and the record being decoded are held in memory.
+
+    parameters:
+    file_path (str or file object): path to the file or an open file
+
+    return:
+    Iterator[dict]: records in file order
+    '''
+    decoder = json.JSONDecoder()
+    whitespace = ' \t\r\n'
+
+    with open_text(file_path) as f:
+        buffer = f.read(JSON_READ_SIZE)
+        pos = 0
+        eof = not buffer
+        in_array = None
+
+        while True:
+            # skip separators up to the next value
+            while pos < len(buffer) and (buffer[pos] in whitespace or (in_array and buffer[pos] == ',')):
+                pos += 1
+
+            if pos == len(buffer):
+                if eof:
+                    break
+                buffer, pos = f.read(JSON_READ_SIZE), 0
+                eof = not buffer
+                continue
+
+            if in_array is None:
+                in_array = buffer[pos] == '['
+                if in_array:
+                    pos += 1
+                continue
+
+            if in_array and buffer[pos] == ']':
+                return
+
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # the record continues in the next block
+                block = f.read(JSON_READ_SIZE)
+                if not block:
+                    raise
+                buffer, pos = buffer[pos:] + block, 0
+                continue
+
+            if not isinstance(record, dict):
+                raise ValueError(f"Expected JSON objects as records, got {type(record).__name__}")
+            yield record
+            pos = end
+
+        if in_array:
+            raise ValueError("Unterminated JSON array")
+
+# integer types tried in order when fitting the smallest type of a column
+INTEGER_TYPES = ('int8', 'int16', 'int32', 'int64')
+
+class DataSchema:
+    def __init__(self, vocabularies: dict, downcast: bool = True, dtypes: Optional[dict] = None):
+        '''
+        Column schema used to load data with compact dtypes
+
+        Without dtypes every chunk is converted the same way (integers to int32,
+        floats to float32), fit works out the smallest types from the data once.
+
+        parameters:
+        vocabularies (dict): column name -> list of category codes
+        downcast (bool): downcast integers to the smallest integer type and floats to float32
+        dtypes (dict): column name -> dtype name ('category' and 'object' included), usually set by fit
+        '''
+        self.vocabularies = vocabularies
+        self.downcast = downcast
+        self.dtypes = dtypes
+
+    @property
+    def fitted(self) -> bool:
+        return self.dtypes is not None
+
+    @classmethod
+    def from_description(cls, file_path: str = DESCRIPTION_PATH, downcast: bool = True) -> 'DataSchema':
+        '''
+        Parse the category vocabularies out of a data description file
+
+        A line starting at column 0 (`Name: description`) opens a feature and the
+        indented lines below it (`code<TAB>meaning`) list its codes.
+
+        parameters:
+        file_path (str): path to data_description.txt
+        downcast (bool): downcast numeric columns when applying the schema
+
+        return:
+        DataSchema: schema with a vocabulary for every feature that lists codes
+        '''
+        vocabularies = {}
+        feature = None
+
+        with open(file_path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                if not line[0].isspace():
+                    feature = line.split(':', 1)[0].strip()
+                    continue
+
+                code = line.strip().split('\t', 1)[0].strip()
+                if feature is not None and code:
+                    vocabularies.setdefault(feature, []).append(code)
+
+        for feature, variants in CODE_VARIANTS.items():
+            if feature in vocabularies:
+                vocabularies[feature] += [code for code in variants if code not in vocabularies[feature]]
+
+        logger.info(f"Parsed vocabularies for {len(vocabularies)} features from {file_path}")
+        return cls(vocabularies, downcast=downcast)
+
+    def fit(self, frames: Iterable[pd.DataFrame]) -> 'DataSchema':
+        '''
+        Work out the dtype of every column once, from all the data that will be converted
+
+        Integers get the smallest type that holds every value, integers with missing
+        values and floats get float32 (float64 without downcast). Codes outside a
+        vocabulary are added to it, so no value is lost and every chunk or shard
+        converted afterwards gets the very same dtypes.
+
+        parameters:
+        frames (Iterable[pd.DataFrame]): whole data frame(s) or every chunk of a source, as parsed
+
+        return:
+        the fitted schema
+        '''
+        kinds, ranges, unknown, seen = {}, {}, {}, {}
+        n_frames = 0
+
+        for frame in frames:
+            n_frames += 1
+            for column in frame.columns:
+                seen[column] = seen.get(column, 0) + 1
+                values = frame[column]
+                kind = kinds.get(column)
+                if kind in ('object', 'category'):
+                    if kind == 'category':
+                        unknown.setdefault(column, set()).update(self._unknown_codes(column, values))
+                    continue
+
+                if column in self.vocabularies and not is_numeric_dtype(values.dtype):
+                    kinds[column] = 'category'
+                    unknown.setdefault(column, set()).update(self._unknown_codes(column, values))
+                    continue
+
+                numeric = self._as_numeric(values)
+                if numeric is None:
+                    kinds[column] = 'object'
+                    continue
+
+                # a gap (also a key missing from some json records) only fits a float
+                present = numeric.dropna()
+                if len(present) < len(numeric) or numeric.dtype.kind == 'f':
+                    kinds[column] = 'float'
+                elif len(present) > 0 and kind != 'float':
+                    kinds[column] = 'int'
+                else:
+                    kinds.setdefault(column, None)
+
+                if len(present) > 0:
+                    low, high = ranges.get(column, (present.min(), present.max()))
+                    ranges[column] = (min(low, present.min()), max(high, present.max()))
+
+        for column, codes in unknown.items():
+            if codes:
+                logger.warning(f"Column '{column}' has values outside its vocabulary: {sorted(codes)}")
+                self.vocabularies[column] = self.vocabularies[column] + sorted(codes)
+
+        float_type = 'float32' if self.downcast else 'float64'
+        dtypes = {}
+        for column, kind in kinds.items():
+            if kind in ('object', 'category'):
+                dtypes[column] = kind
+            elif kind == 'int' and seen[column] == n_frames:
+                low, high = ranges[column]
+                candidates = INTEGER_TYPES if self.downcast else ('int64',)
+                dtypes[column] = next((t for t in candidates if np.iinfo(t).min <= low and high <= np.iinfo(t).max), 'float64')
+            else:
+                # floats, integers absent from some frames and columns that were always missing
+                dtypes[column] = float_type
+
+        self.dtypes = dtypes
+        logger.info(f"Fitted dtypes of {len(dtypes)} columns")
+        return self
+
+    def _unknown_codes(self, column: str, values: pd.Series) -> set:
+        return set(pd.unique(values.dropna()).astype(str)) - set(self.vocabularies[column])
+
+    @staticmethod
+    def _as_numeric(values: pd.Series) -> Optional[pd.Series]:
+        # numbers, or strings that all parse as numbers (empty strings count as missing)
+        if is_bool_dtype(values.dtype):
+            return None
+        if is_numeric_dtype(values.dtype):
+            return values
+        if values.dtype != object:
+            return None
+
+        present = values.dropna()
+        present = present[present.astype(str).str.strip() != '']
+        numeric = pd.to_numeric(present, errors='coerce')
+        if numeric.isna().any():
+            return None
+        return pd.to_numeric(values.where(values.astype(str).str.strip() != ''), errors='coerce')
+
+    def _cast(self, column: str, values: pd.Series, dtype: str) -> pd.Series:
+        numeric = self._as_numeric(values)
+        if numeric is None:
+            logger.warning(f"Column '{column}' does not hold numbers, keeping {values.dtype} instead of {dtype}")
+            return values
+
+        if np.dtype(dtype).kind in 'iu':
+            present = numeric.dropna()
+            info = np.iinfo(dtype)
+            if len(present) < len(numeric) or (len(present) > 0 and (present.min() < info.min or present.max() > info.max)):
+                # the schema was fitted on other data, a silent cast would wrap around
+                logger.warning(f"Column '{column}' does not fit the fitted {dtype}, using float64")
+                dtype = 'float64'
+        return numeric.astype(dtype)
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        '''
+        Convert string columns to categories of their vocabulary and numeric columns to their schema dtype
+
+        Every frame is converted to the same dtypes: the fitted ones, or int32 and
+        float32 for an unfitted schema. Categories are always the vocabulary, codes
+        outside it become missing values (fit adds the codes of the data to it).
+
+        parameters:
+        df (pd.DataFrame): data frame as parsed from the file
+
+        return:
+        pd.DataFrame: data frame with compact dtypes
+        '''
+        compact = df.copy(deep=False)
+        dtypes = self.dtypes or {}
+
+        for column in compact.columns:
+            values = compact[column]
+            dtype = dtypes.get(column)
+
+            if column in self.vocabularies and (values.dtype == object or dtype == 'category'):
+                categories = self.vocabularies[column]
+                if isinstance(values.dtype, pd.CategoricalDtype) and list(values.dtype.categories) == categories:
+                    continue
+                converted = pd.Categorical(values, categories=categories)
+                unknown = values.notna() & pd.isna(converted)
+                if unknown.any():
+                    logger.warning(f"Column '{column}' has values outside its vocabulary, set to missing: {sorted(pd.unique(values[unknown]).astype(str))}")
+                compact[column] = converted
+
+            elif dtype == 'object':
+                # a chunk where a text column is all missing reads as float
+                if values.dtype != object:
+                    compact[column] = values.astype(object)
+
+            elif dtype not in (None, 'category'):
+                if values.dtype != dtype:
+                    compact[column] = self._cast(column, values, dtype)
+
+            elif dtype is None and self.downcast and is_numeric_dtype(values.dtype) and not is_bool_dtype(values.dtype):
+                # unfitted schema: fixed widths, so chunks agree without seeing the data
+                if values.dtype.kind in 'iu' and values.dtype.itemsize > 4:
+                    info = np.iinfo('int32')
+                    if len(values) == 0 or (info.min <= values.min() and values.max() <= info.max):
+                        compact[column] = values.astype('int32')
+                elif values.dtype.kind == 'f' and values.dtype != 'float32':
+                    compact[column] = values.astype('float32')
+
+        return compact
+
 # 1. Base class (interface)
 class DataProcessor(ABC):
     @abstractmethod
-    def load_data(self, file_path: str) -> pd.DataFrame:
-        """Abstract method to ingest data from a file"""
+    def load_data(self, file_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Abstract method to ingest data from a file, only the given columns if any"""
         pass
 
+    def load_chunks(self, file_path: str, chunksize: Optional[int] = None, chunk_bytes: Optional[int] = None, columns: Optional[List[str]] = None, dtypes: Optional[dict] = None) -> Iterator[pd.DataFrame]:
+        '''
+        Stream the file as data frames of bounded size
+
+        Formats without an incremental reader load the whole file and slice it,
+        so only the chunks handed downstream are bounded.
+
+        parameters:
+        file_path (str): path to the file
+        chunksize (int): number of rows per chunk
+        chunk_bytes (int): in-memory size per chunk, used when chunksize is not given
+        columns (List[str]): columns to read, default is every column
+        dtypes (dict): fitted dtypes (DataSchema.dtypes), fix the columns of formats whose records may lack keys
+
+        return:
+        Iterator[pd.DataFrame]: data frame chunks in file order
+        '''
+        data = self.load_data(file_path, columns=columns)
+        if chunksize is None:
+            chunksize = rows_per_chunk(data.head(PROBE_ROWS), chunk_bytes)
+        yield from split_frame(data, chunksize)
+
 # file types --> .csv, .json, .xlsx
 
 # 2. Concreate class
 class CSVProcessor(DataProcessor):
-    def load_data(self, file_path: str) -> pd.DataFrame:
-        """Extract data and return file as dataframe"""
-        return pd.read_csv(file_path)
+    def load_data(self, file_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Extract data and return file as dataframe, other columns are skipped by the parser"""
+        return pd.read_csv(file_path, usecols=columns)
+
+    def load_chunks(self, file_path: str, chunksize: Optional[int] = None, chunk_bytes: Optional[int] = None, columns: Optional[List[str]] = None, dtypes: Optional[dict] = None) -> Iterator[pd.DataFrame]:
+        '''
+        Read the csv file incrementally, holding at most one chunk in memory
+
+        parameters:
+        file_path (str): path to the csv file
+        chunksize (int): number of rows per chunk
+        chunk_bytes (int): in-memory size per chunk, used when chunksize is not given
+        columns (List[str]): columns to read, default is every column
+        dtypes (dict): not needed, every chunk has the columns of the header (the schema casts the dtypes)
+
+        return:
+        Iterator[pd.DataFrame]: data frame chunks in file order
+        '''
+        with pd.read_csv(file_path, iterator=True, usecols=columns) as reader:
+            if chunksize is None:
+                probe = reader.get_chunk(PROBE_ROWS)
+                chunksize = rows_per_chunk(probe, chunk_bytes)
+                yield from split_frame(probe, chunksize)
+
+            while True:
+                try:
+                    yield reader.get_chunk(chunksize)
+                except StopIteration:
+                    return
     
 class JSONProcessor(DataProcessor):
-    def load_data(self, file_path: str) -> pd.DataFrame:
-        return pd.read_json(file_path)
+    def load_data(self, file_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        if self.is_json_lines(file_path):
+            data = pd.read_json(file_path, lines=True)
+        else:
+            data = pd.read_json(file_path)
+        data = self.missing_strings_to_nan(data)
+        return data if columns is None else data[columns]
+
+    @staticmethod
+    def missing_strings_to_nan(df: pd.DataFrame) -> pd.DataFrame:
+        '''
+        Turn the strings read_csv reads as missing (e.g. "NA") into NaN, so numeric columns parse alike
+        '''
+        for column in df.select_dtypes(include='object').columns:
+            missing = df[column].isin(NA_STRINGS)
+            if missing.any():
+                values = df[column].where(~missing)
+                # a column that was only numbers and missing markers becomes numeric
+                numeric = pd.to_numeric(values, errors='coerce')
+                df[column] = numeric if numeric.notna().sum() == values.notna().sum() and values.notna().any() else values
+        return df
+
+    @staticmethod
+    def is_json_lines(file_path: Union[str, IO]) -> bool:
+        '''
+        Check whether the file holds newline delimited JSON instead of a JSON array
+
+        parameters:
+        file_path (str or file object): path to the json file or an open, seekable file
+
+        return:
+        bool: True for newline delimited JSON
+        '''
+        name = file_path if isinstance(file_path, str) else getattr(file_path, 'name', '')
+        if name.endswith(('.ndjson', '.jsonl')):
+            return True
+
+        if isinstance(file_path, str):
+            with open(file_path, encoding='utf-8') as f:
+                head = f.read(JSON_READ_SIZE)
+        else:
+            head = file_path.read(JSON_READ_SIZE)
+            file_path.seek(0)
+            if isinstance(head, bytes):
+                head = head.decode('utf-8', errors='ignore')
+        return not head.lstrip().startswith('[')
+
+    def load_chunks(self, file_path: str, chunksize: Optional[int] = None, chunk_bytes: Optional[int] = None, columns: Optional[List[str]] = None, dtypes: Optional[dict] = None) -> Iterator[pd.DataFrame]:
+        '''
+        Decode the json file incrementally into chunks with a fixed column order and dtypes
+
+        Records may lack keys, so the columns and dtypes can not be read off the first
+        chunk. Without fitted dtypes a first pass over the file fits them (see fit_dtypes),
+        then every chunk has exactly those columns, cast to those dtypes; nothing is
+        promoted halfway through the stream. Strings read_csv reads as missing (e.g. "NA")
+        are missing values here too.
+
+        parameters:
+        file_path (str or file object): path to a JSON array or newline delimited JSON file, an open file needs dtypes
+        chunksize (int): number of rows per chunk
+        chunk_bytes (int): in-memory size per chunk, used when chunksize is not given
+        columns (List[str]): keys to keep, default is every key
+        dtypes (dict): fitted dtypes of the file's columns (DataSchema.dtypes), fitted here if None
+
+        return:
+        Iterator[pd.DataFrame]: data frame chunks in file order
+        '''
+        if dtypes is None:
+            if not isinstance(file_path, str):
+                raise ValueError("Streaming json from an open file needs dtypes, fit them with fit_dtypes on another handle")
+            dtypes = self.fit_dtypes(file_path, chunksize=chunksize, chunk_bytes=chunk_bytes, columns=columns)
+
+        schema = DataSchema({}, downcast=False, dtypes=dtypes)
+        fixed = list(columns) if columns is not None else list(dtypes)
+        for chunk in self.decode_chunks(file_path, chunksize=chunksize, chunk_bytes=chunk_bytes, columns=fixed, warn_dropped=columns is None):
+            yield schema.apply(chunk)
+
+    def fit_dtypes(self, file_path: Union[str, IO], chunksize: Optional[int] = None, chunk_bytes: Optional[int] = None, columns: Optional[List[str]] = None) -> dict:
+        '''
+        Pass over the json file once to find every key and the dtype that holds all its values
+
+        Keys missing from some records (or first seen late in the file) are fitted as float
+        or object, like the chunks without them.
+
+        parameters:
+        file_path (str or file object): path to a JSON array or newline delimited JSON file, or an open file
+        chunksize (int): number of rows per chunk
+        chunk_bytes (int): in-memory size per chunk, used when chunksize is not given
+        columns (List[str]): keys to keep, default is every key
+
+        return:
+        dict: column -> dtype name, in the order the keys first appear
+        '''
+        logger.info("Fitting json column dtypes before streaming")
+        chunks = self.decode_chunks(file_path, chunksize=chunksize, chunk_bytes=chunk_bytes, columns=columns)
+        return DataSchema({}, downcast=False).fit(chunks).dtypes
+
+    def decode_chunks(self, file_path: Union[str, IO], chunksize: Optional[int] = None, chunk_bytes: Optional[int] = None, columns: Optional[List[str]] = None, warn_dropped: bool = False) -> Iterator[pd.DataFrame]:
+        '''
+        Decode the records into chunks as parsed, without casting
+
+        With columns every chunk has exactly those columns, other keys are dropped
+        (with a warning if warn_dropped). Without, keys first seen in a later chunk are
+        added to it and the following chunks.
+        '''
+        selected = columns
+        rows = chunksize if chunksize is not None else PROBE_ROWS
+        records = []
+        known = set(columns or [])
+        sized = chunksize is not None
+
+        def build(records):
+            nonlocal rows, sized
+            chunk = self.missing_strings_to_nan(pd.DataFrame.from_records(records, columns=columns))
+            if not sized:
+                rows, sized = rows_per_chunk(chunk, chunk_bytes), True
+            return chunk
+
+        for record in iter_json_records(file_path):
+            if not record.keys() <= known:
+                new_keys = [key for key in record if key not in known]
+                if selected is not None:
+                    if warn_dropped:
+                        logger.warning(f"Dropping keys the dtypes were not fitted with: {new_keys}")
+                    known.update(new_keys)
+                else:
+                    columns = (columns or []) + new_keys
+                    known.update(new_keys)
+            records.append(record)
+
+            if len(records) >= rows:
+                chunk = build(records)
+                records = []
+                yield from split_frame(chunk, rows)
+
+        if records:
+            yield from split_frame(build(records), rows)
     
 class XLSXProcessor(DataProcessor):
-    def load_data(self, file_path: str) -> pd.DataFrame:
-        return pd.read_excel(file_path)
+    def load_data(self, file_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        return pd.read_excel(file_path, usecols=columns)
+
+class ZIPProcessor(DataProcessor):
+    def __init__(self, pattern: Optional[str] = None):
+        '''
+        Read data files straight out of a zip archive without extracting them
+
+        parameters:
+        pattern (str): glob pattern for the members to read (e.g. '*.csv'), default is every supported member
+        '''
+        self.pattern = pattern
+
+    def members(self, archive: zipfile.ZipFile) -> List[str]:
+        '''
+        List the members of the archive to read, in archive order
+
+        parameters:
+        archive (zipfile.ZipFile): open archive
+
+        return:
+        List[str]: member names
+        '''
+        names = [
+            name for name in archive.namelist()
+            if not name.endswith('/')
+            and get_extension(name) in SUPPORTED_EXTENSIONS
+            and get_extension(name) != '.zip'
+            and (self.pattern is None or fnmatch(name, self.pattern))
+        ]
+        if not names:
+            raise ValueError(f"No supported members matching '{self.pattern or '*'}' in archive")
+        return names
+
+    def load_data(self, file_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        '''
+        Load the matching members into one data frame
+
+        parameters:
+        file_path (str): path to the zip archive
+        columns (List[str]): columns to read from every member, default is every column
+
+        return:
+        pd.DataFrame: members concatenated in archive order
+        '''
+        frames = []
+        with zipfile.ZipFile(file_path) as archive:
+            for name in self.members(archive):
+                logger.info(f"reading member {name} from {file_path}")
+                processor = DataProcessorFactory.get_processor(get_extension(name))
+                with archive.open(name) as member:
+                    frames.append(processor.load_data(member, columns=columns))
+
+        if len(frames) == 1:
+            return frames[0]
+        return pd.concat(reconcile_frames(frames), ignore_index=True, copy=False)
+
+    def load_chunks(self, file_path: str, chunksize: Optional[int] = None, chunk_bytes: Optional[int] = None, columns: Optional[List[str]] = None, dtypes: Optional[dict] = None) -> Iterator[pd.DataFrame]:
+        '''
+        Stream the matching members through the chunked reader of their format
+
+        parameters:
+        file_path (str): path to the zip archive
+        chunksize (int): number of rows per chunk
+        chunk_bytes (int): in-memory size per chunk, used when chunksize is not given
+        columns (List[str]): columns to read from every member, default is every column
+        dtypes (dict): fitted dtypes passed on to the member readers
+
+        return:
+        Iterator[pd.DataFrame]: data frame chunks in archive order
+        '''
+        with zipfile.ZipFile(file_path) as archive:
+            for name in self.members(archive):
+                logger.info(f"streaming member {name} from {file_path}")
+                processor = DataProcessorFactory.get_processor(get_extension(name))
+                member_dtypes = dtypes
+                if member_dtypes is None and isinstance(processor, JSONProcessor):
+                    # json members are fitted in a first pass over the member, then read again
+                    with archive.open(name) as member:
+                        member_dtypes = processor.fit_dtypes(member, chunksize=chunksize, chunk_bytes=chunk_bytes, columns=columns)
+                with archive.open(name) as member:
+                    yield from processor.load_chunks(member, chunksize=chunksize, chunk_bytes=chunk_bytes, columns=columns, dtypes=member_dtypes)
 
 # 3. Factory Class
 class DataProcessorFactory:
     @staticmethod
-    def get_processor(file_extension):
+    def get_processor(file_extension, member_pattern=None):
         if file_extension == '.csv':
             return CSVProcessor()
-        elif file_extension == '.json':
+        elif file_extension in ('.json', '.ndjson', '.jsonl'):
             return JSONProcessor()
         elif file_extension == '.xlsx':
             return XLSXProcessor()
+        elif file_extension == '.zip':
+            return ZIPProcessor(pattern=member_pattern)
         else :
             raise ValueError("Unsupported file type")
 
 
+SUPPORTED_EXTENSIONS = ('.csv', '.json', '.ndjson', '.jsonl', '.xlsx', '.zip')
+
+def get_extension(file_path: str) -> str:
+    return file_path[file_path.rfind('.'):]
+
+def expand_paths(file_path: str) -> List[str]:
+    '''
+    Resolve a file, a directory of shards or a glob pattern into the files to load
+
+    parameters:
+    file_path (str): path to a file or a directory, or a glob pattern (e.g. ./data/raw/2024-*.csv)
+
+    return:
+    List[str]: sorted file paths
+    '''
+    if os.path.isdir(file_path):
+        paths = [
+            os.path.join(file_path, name) for name in os.listdir(file_path)
+            if get_extension(name) in SUPPORTED_EXTENSIONS
+        ]
+    elif glob.has_magic(file_path):
+        paths = [path for path in glob.glob(file_path, recursive=True) if os.path.isfile(path)]
+    else:
+        return [file_path]
+
+    if not paths:
+        raise FileNotFoundError(f"No data files found for {file_path}")
+    return sorted(paths)
+
+def reconcile_frames(frames: List[pd.DataFrame]) -> List[pd.DataFrame]:
+    '''
+    Align shards to one schema so they can be concatenated without object fallbacks
+
+    Columns are the union in first-seen order. Categorical columns get the union of
+    their categories, other columns the common numpy type. Integer columns missing
+    from some shards become float so the gaps can hold NaN.
+
+    parameters:
+    frames (List[pd.DataFrame]): shards in load order
+
+    return:
+    List[pd.DataFrame]: shards with identical columns and dtypes
+    '''
+    columns = list(dict.fromkeys(column for frame in frames for column in frame.columns))
+
+    dtypes = {}
+    for column in columns:
+        present = [frame[column].dtype for frame in frames if column in frame.columns]
+
+        if all(isinstance(dtype, pd.CategoricalDtype) for dtype in present):
+            categories = union_categoricals(
+                [pd.Categorical([], categories=dtype.categories) for dtype in present]
+            ).categories
+            dtypes[column] = pd.CategoricalDtype(categories)
+            continue
+
+        try:
+            common = np.result_type(*present)
+        except TypeError:
+            common = np.dtype(object)
+        if len(present) < len(frames) and common.kind in 'biu':
+            common = np.dtype('float64')
+        dtypes[column] = common
+
+    aligned = []
+    for frame in frames:
+        if list(frame.columns) != columns:
+            frame = frame.reindex(columns=columns)
+        mismatched = {column: dtype for column, dtype in dtypes.items() if frame[column].dtype != dtype}
+        if mismatched:
+            frame = frame.astype(mismatched, copy=False)
+        aligned.append(frame)
+    return aligned
+
+def load_single_file(file_path: str, cache: Optional[DatasetCache] = None, schema: Optional[DataSchema] = None, member: Optional[str] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    '''
+    Load one file into a data frame, through the cache when given
+
+    parameters:
+    file_path (str): path to the file
+    cache (DatasetCache): columnar cache to read from and fill
+    schema (DataSchema): schema applied to the loaded data
+    member (str): glob pattern for the members to read when the file is a zip archive
+    columns (List[str]): columns to load, default is every column
+
+    return:
+    pd.DataFrame: loaded data
+    '''
+    data = cache.load(file_path, variant=member, columns=columns) if cache is not None else None
+    if data is None:
+        processor = DataProcessorFactory.get_processor(get_extension(file_path), member_pattern=member)
+        if cache is not None:
+            # the cache entry holds every column, so later runs can project differently
+            data = processor.load_data(file_path)
+            cache.store(file_path, data, variant=member)
+            if columns is not None:
+                data = data[columns]
+        else:
+            data = processor.load_data(file_path, columns=columns)
+
+    if schema is not None:
+        data = schema.apply(data)
+    return data
+
+def load_shards(paths: List[str], max_workers: Optional[int] = None, cache: Optional[DatasetCache] = None, schema: Optional[DataSchema] = None, member: Optional[str] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    '''
+    Parse shards in a process pool and concatenate them into one data frame
+
+    parameters:
+    paths (List[str]): shard files in the order they should be concatenated
+    max_workers (int): number of worker processes, default is the number of cores
+    cache (DatasetCache): columnar cache used per shard
+    schema (DataSchema): schema applied to every shard
+    member (str): glob pattern for the members to read from zip shards
+    columns (List[str]): columns to load from every shard, default is every column
+
+    return:
+    pd.DataFrame: all shards in one data frame
+    '''
+    max_workers = min(max_workers or os.cpu_count() or 1, len(paths))
+    logger.info(f"Loading {len(paths)} shards with {max_workers} workers")
+
+    if max_workers == 1:
+        frames = [load_single_file(path, cache, schema, member, columns) for path in paths]
+    else:
+        if cache is not None:
+            # one index update here, the workers then only read the index
+            cache.fingerprint_all(paths)
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            frames = list(pool.map(load_single_file, paths, repeat(cache), repeat(schema), repeat(member), repeat(columns)))
+
+    return pd.concat(reconcile_frames(frames), ignore_index=True, copy=False)
+
 # Define data loading
-def load_file(file_path: str) -> pd.DataFrame:
-    '''Function for load the data file into the df'''
+def load_file(file_path: str, chunksize: Optional[int] = None, chunk_bytes: Optional[int] = None, cache: Optional[DatasetCache] = None, schema: Optional[DataSchema] = None, max_workers: Optional[int] = None, member: Optional[str] = None, columns: Optional[List[str]] = None) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    '''
+    Function for load the data file into the df
+
+    parameters:
+    file_path (str): path to the file, a directory of shards or a glob pattern
+    chunksize (int): if given, stream the file in chunks of this many rows
+    chunk_bytes (int): if given, stream the file in chunks of about this many bytes in memory
+    cache (DatasetCache): columnar cache to read from and fill, the file is always parsed if None
+    schema (DataSchema): schema applied to the loaded data for compact dtypes, fitted on all of it if it is not yet
+    max_workers (int): worker processes used to parse shards, default is the number of cores
+    member (str): glob pattern for the members to read from zip archives, default is every supported member
+    columns (List[str]): columns to load, the others are skipped as early as the format allows
+
+    return:
+    pandas data frame, or an iterator of data frame chunks in streaming mode
+    '''
+    if chunksize is not None or chunk_bytes is not None:
+        return stream_file(file_path, chunksize=chunksize, chunk_bytes=chunk_bytes, cache=cache, schema=schema, member=member, columns=columns)
+
+    # an unfitted schema is fitted once on all the data, so every shard gets the same dtypes
+    fit_schema = schema is not None and not schema.fitted
+    shard_schema = None if fit_schema else schema
+
     try:
-        file_extension = file_path[file_path.rfind('.'):]
-        logger.info(f"loading file {file_path} (Extension: {file_extension})")
+        paths = expand_paths(file_path)
+        if len(paths) > 1:
+            data = load_shards(paths, max_workers=max_workers, cache=cache, schema=shard_schema, member=member, columns=columns)
+        else:
+            file_extension = get_extension(paths[0])
+            logger.info(f"loading file {paths[0]} (Extension: {file_extension})")
+            data = load_single_file(paths[0], cache=cache, schema=shard_schema, member=member, columns=columns)
 
-        processor = DataProcessorFactory.get_processor(file_extension)
-        data = processor.load_data(file_path)
+        if fit_schema:
+            data = copy.deepcopy(schema).fit([data]).apply(data)
 
         logger.info(f"Successfully loaded data. Shape: {data.shape}")
         return data
@@ -59,9 +844,104 @@ def load_file(file_path: str) -> pd.DataFrame:
         logger.error(f"Error loading file: {e}")
         raise
 
+def stream_file(file_path: str, chunksize: Optional[int] = None, chunk_bytes: Optional[int] = None, cache: Optional[DatasetCache] = None, schema: Optional[DataSchema] = None, member: Optional[str] = None, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    '''
+    Stream the data file as data frame chunks of bounded size
+
+    parameters:
+    file_path (str): path to the file, a directory of shards or a glob pattern
+    chunksize (int): number of rows per chunk
+    chunk_bytes (int): in-memory size per chunk, used when chunksize is not given
+    cache (DatasetCache): columnar cache to stream from when it holds the file
+    schema (DataSchema): schema applied to every chunk for compact dtypes, fitted in a first pass over the file if it is not yet
+    member (str): glob pattern for the members to stream from zip archives
+    columns (List[str]): columns to read, default is every column
+
+    return:
+    Iterator[pd.DataFrame]: data frame chunks in file (and shard) order
+    '''
+    if chunksize is None and chunk_bytes is None:
+        raise ValueError("Provide either chunksize or chunk_bytes for streaming")
+    if (chunksize is not None and chunksize <= 0) or (chunk_bytes is not None and chunk_bytes <= 0):
+        raise ValueError("chunksize and chunk_bytes must be positive")
+
+    if schema is not None and not schema.fitted:
+        # one extra pass over the raw chunks, so every chunk gets the same dtypes
+        logger.info(f"Fitting the schema on {file_path} before streaming")
+        raw = stream_file(file_path, chunksize=chunksize, chunk_bytes=chunk_bytes, cache=cache, member=member, columns=columns)
+        schema = copy.deepcopy(schema).fit(raw)
+
+    try:
+        for path in expand_paths(file_path):
+            file_extension = get_extension(path)
+            logger.info(f"streaming file {path} (Extension: {file_extension})")
+
+            chunks = cache.load_chunks(path, chunksize=chunksize, chunk_bytes=chunk_bytes, variant=member, columns=columns) if cache is not None else None
+            if chunks is None:
+                processor = DataProcessorFactory.get_processor(file_extension, member_pattern=member)
+                dtypes = schema.dtypes if schema is not None else None
+                chunks = processor.load_chunks(path, chunksize=chunksize, chunk_bytes=chunk_bytes, columns=columns, dtypes=dtypes)
+
+            rows = 0
+            for chunk in chunks:
+                rows += len(chunk)
+                yield schema.apply(chunk) if schema is not None else chunk
+
+            logger.info(f"Successfully streamed {rows} rows from {path}")
+    except Exception as e:
+        logger.error(f"Error streaming file: {e}")
+        raise
+
+class ChunkedDataSource:
+    def __init__(self, file_path: str, chunksize: Optional[int] = None, chunk_bytes: Optional[int] = None, cache: Optional[DatasetCache] = None, schema: Optional[DataSchema] = None, member: Optional[str] = None, columns: Optional[List[str]] = None):
+        '''
+        Re-iterable handle to a data file that is consumed chunk by chunk
+
+        Every iteration opens the file again, so downstream steps can make
+        several passes (e.g. fit statistics, then transform) at bounded memory.
+
+        parameters:
+        file_path (str): path to the file
+        chunksize (int): number of rows per chunk
+        chunk_bytes (int): in-memory size per chunk, used when chunksize is not given
+        cache (DatasetCache): columnar cache to stream from when it holds the file
+        schema (DataSchema): schema applied to every chunk for compact dtypes, fitted on the first iteration if it is not yet
+        member (str): glob pattern for the members to stream from zip archives
+        columns (List[str]): columns to read, default is every column
+        '''
+        if chunksize is None and chunk_bytes is None:
+            raise ValueError("Provide either chunksize or chunk_bytes for streaming")
+
+        self.file_path = file_path
+        self.chunksize = chunksize
+        self.chunk_bytes = chunk_bytes
+        self.cache = cache
+        self.schema = schema
+        self.member = member
+        self.columns = columns
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        if self.schema is not None and not self.schema.fitted:
+            # fitted on the first iteration and reused by every later pass
+            raw = stream_file(
+                self.file_path, chunksize=self.chunksize, chunk_bytes=self.chunk_bytes,
+                cache=self.cache, member=self.member, columns=self.columns
+            )
+            self.schema = copy.deepcopy(self.schema).fit(raw)
+        return stream_file(
+            self.file_path, chunksize=self.chunksize, chunk_bytes=self.chunk_bytes,
+            cache=self.cache, schema=self.schema, member=self.member, columns=self.columns
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"ChunkedDataSource(file_path={self.file_path!r}, "
+            f"chunksize={self.chunksize}, chunk_bytes={self.chunk_bytes})"
+        )
+
 
 
 
 #example = load_file("./data/raw/test.csv")
 # example = load_file("./data/raw/csvjson.json")
-# print(example)
\ No newline at end of file
+# print(example)
@@ -3,8 +3,14 @@ import pandas as pd
 
 from sklearn.base import RegressorMixin
 from sklearn.pipeline import Pipeline
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import StandardScaler
+from sklearn import linear_model
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.preprocessing import StandardScaler, OneHotEncoder, FunctionTransformer
+
+from src.handle_missing_values import FillMisssingValue
+from src.feature_engineering import sparse_columns, sparse_frame_to_csr, TargetEncoding
+from src.load_data import DataSchema
 
 import logging
 
@@ -51,7 +57,7 @@ class LinearRegression(ModelBuildingStrategy):
         pipeline = Pipeline(
             [
                 ('scaler', StandardScaler()),
-                ('model', LinearRegression()),
+                ('model', linear_model.LinearRegression()),
             ]
         )
 
@@ -92,4 +98,91 @@ class ModelBuilder:
         return:
         RegressorMixin: A trained scikit-learn model instance.
         '''
-        return self.strategy.build_and_train_model(X_train, y_train)
\ No newline at end of file
+        return self.strategy.build_and_train_model(X_train, y_train)
+
+def build_pipeline(X_train: pd.DataFrame, fill_method: str = 'mean', description_path: str = None, target_encoding: list = None, sparse: bool = False) -> Pipeline:
+    '''
+    Build the (unfitted) preprocessing and Linear Regression pipeline for the columns of X_train
+
+    parameters:
+    X_train (pd.DataFrame): training features, only the column names and dtypes are used
+    fill_method (str): FillMisssingValue method fitted with the model, None to skip
+    description_path (str): data_description.txt to take fixed category vocabularies from, None to learn categories from the data
+    target_encoding (list): raw categorical columns to target encode inside the pipeline, None to skip
+    sparse (bool): keep the one-hot encoded design matrix sparse (CSR) whatever its density
+
+    return:
+    Pipeline: pipeline ready to be fitted
+    '''
+    # identify categorical and numerical columns
+    categorical_cols = X_train.select_dtypes(include=['object', 'category']).columns
+    sparse_cols = pd.Index(sparse_columns(X_train))
+    numerical_cols = X_train.select_dtypes(include='number').columns.difference(sparse_cols, sort=False)
+
+    # target encoded columns reach the preprocessor as floats
+    encoded_cols = pd.Index(target_encoding or [])
+    categorical_cols = categorical_cols.difference(encoded_cols, sort=False)
+    numerical_cols = numerical_cols.append(encoded_cols.difference(numerical_cols, sort=False))
+
+    # columns with a documented vocabulary are encoded with a layout known before any data is seen
+    vocabularies = DataSchema.from_description(description_path).vocabularies if description_path else {}
+    vocabulary_cols = pd.Index([column for column in categorical_cols if column in vocabularies])
+    categorical_cols = categorical_cols.difference(vocabulary_cols, sort=False)
+
+    logger.info(f"Categorical Columns: {categorical_cols.tolist()}")
+    if len(vocabulary_cols) > 0:
+        logger.info(f"Categorical Columns with fixed vocabularies: {vocabulary_cols.tolist()}")
+    logger.info(f"Numerical Columns: {numerical_cols.tolist()}")
+    if len(sparse_cols) > 0:
+        logger.info(f"Sparse Columns: {len(sparse_cols)}")
+
+    # Define preprocessing for categorical and numerical features
+    numerical_transformar = SimpleImputer(strategy='mean')
+    categorical_transformar = Pipeline(
+        [
+            ('imputer', SimpleImputer(strategy='most_frequent')),
+            ('onehot', OneHotEncoder(handle_unknown='ignore')),
+        ]
+    )
+
+    # Bundle preprocessing for numerical and categorical data
+    transformers = [
+        ('num', numerical_transformar, numerical_cols),
+        ('cat', categorical_transformar, categorical_cols),
+    ]
+
+    # nothing here depends on the data: missing values are the documented NA code and
+    # codes outside the vocabulary encode as all zeros
+    if len(vocabulary_cols) > 0:
+        vocabulary_transformar = Pipeline(
+            [
+                ('imputer', SimpleImputer(strategy='constant', fill_value='NA')),
+                ('onehot', OneHotEncoder(categories=[vocabularies[column] for column in vocabulary_cols], handle_unknown='ignore')),
+            ]
+        )
+        transformers.append(('vocab', vocabulary_transformar, vocabulary_cols))
+
+    # sparse one-hot blocks of in-memory frames go to the model as CSR, so the whole design matrix stays sparse
+    if len(sparse_cols) > 0:
+        transformers.append(
+            ('sparse', FunctionTransformer(sparse_frame_to_csr, accept_sparse=True, feature_names_out='one-to-one'), sparse_cols)
+        )
+
+    # the one-hot encoders output CSR, a threshold of 1 keeps the stacked matrix sparse
+    preprocessor = ColumnTransformer(transformers, sparse_threshold=1.0 if sparse or len(sparse_cols) > 0 else 0.3)
+
+    # Defineing model training
+    steps = [
+        ("preprocessor", preprocessor),
+        ("model", linear_model.LinearRegression())
+    ]
+
+    # the fitted mapping travels inside the model artifact, so serving encodes raw categories alike
+    if len(encoded_cols) > 0:
+        steps.insert(0, ("target_encoding", TargetEncoding(list(encoded_cols))))
+
+    # the fitted fill values travel inside the model artifact, so serving imputes with training statistics
+    if fill_method is not None:
+        steps.insert(0, ("imputer", FillMisssingValue(method=fill_method)))
+
+    return Pipeline(steps=steps)
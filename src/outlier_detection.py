@@ -1,27 +1,292 @@
 # import necessary libraries
 from abc import ABC, abstractmethod
+from typing import Iterator
+import json
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+from scipy.linalg import solve_triangular
+from scipy.stats import chi2
+from sklearn.covariance import MinCovDet
+from sklearn.exceptions import NotFittedError
+from src.streaming_statistics import RunningMoments, QuantileSketch
 
 import logging
 
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 logger = logging.getLogger(__name__)
 
+# quantiles used by detection (IQR) and capping, computed together in one sort
+DEFAULT_QUANTILES = (0.01, 0.25, 0.75, 0.99)
+
+def numeric_columns(df: pd.DataFrame) -> list:
+    '''
+    Dense numeric columns outliers are looked for in
+
+    Sparse columns (e.g. a sparse one-hot block) are left out: most of their values
+    are the fill value, so every row with a rare category would look like an outlier.
+    '''
+    return [column for column, dtype in df.select_dtypes(include='number').dtypes.items() if not isinstance(dtype, pd.SparseDtype)]
+
+class ColumnStatistics:
+    def __init__(self, columns: pd.Index, count: np.ndarray, mean: np.ndarray, std: np.ndarray, quantiles: dict):
+        '''
+        Per column statistics shared by outlier detection and handling
+
+        parameters:
+        columns (pd.Index): columns the statistics belong to
+        count (np.ndarray): number of non-missing values
+        mean (np.ndarray): mean of every column
+        std (np.ndarray): standard deviation (ddof=1) of every column
+        quantiles (dict): quantile -> np.ndarray of values per column
+        '''
+        self.columns = columns
+        self.count = pd.Series(count, index=columns)
+        self.mean = pd.Series(mean, index=columns)
+        self.std = pd.Series(std, index=columns)
+        self.quantiles = {q: pd.Series(values, index=columns) for q, values in quantiles.items()}
+
+    def quantile(self, q: float) -> pd.Series:
+        '''
+        Precomputed quantile of every column, like df.quantile(q)
+        '''
+        if q not in self.quantiles:
+            raise KeyError(f"Quantile {q} was not computed, available: {sorted(self.quantiles)}")
+        return self.quantiles[q]
+
+def compute_statistics(df: pd.DataFrame, quantiles: tuple = DEFAULT_QUANTILES) -> ColumnStatistics:
+    '''
+    Moments and quantiles of every numeric column from one sort of the column block
+
+    Quantiles are linearly interpolated between the sorted non-missing values, like pandas.
+    Blocks without missing values are only partitioned around the needed ranks.
+
+    parameters:
+    df (pd.DataFrame): numeric data frame, sparse columns are skipped
+    quantiles (tuple): quantiles to compute
+
+    return:
+    ColumnStatistics: statistics of every dense column
+    '''
+    df = df[numeric_columns(df)]
+    block = df.to_numpy(dtype='float64', na_value=np.nan)
+    count = (~np.isnan(block)).sum(axis=0)
+
+    if len(block) > 0 and (count == len(block)).all():
+        # without gaps every column needs the same ranks, a partition around them replaces the sort
+        positions = np.array(quantiles, dtype='float64') * (len(block) - 1)
+        ranks = np.unique(np.concatenate([np.floor(positions), np.ceil(positions)]).astype('int64'))
+        block = np.partition(block, ranks, axis=0) if len(ranks) > 0 else block
+    else:
+        block = np.sort(block, axis=0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # NaN sorts last, so the first count rows of every column are its values (order does not matter for the moments)
+        valid = np.arange(len(block))[:, None] < count
+        total = np.where(valid, block, 0.0).sum(axis=0)
+        mean = np.where(count > 0, total / count, np.nan)
+        squares = (np.where(valid, block - mean, 0.0) ** 2).sum(axis=0)
+        std = np.where(count > 1, np.sqrt(squares / (count - 1)), np.nan)
+
+        values = {}
+        if len(block) > 0:
+            for q in quantiles:
+                position = q * (count - 1)
+                lower = np.clip(np.floor(position).astype('int64'), 0, len(block) - 1)
+                upper = np.clip(np.ceil(position).astype('int64'), 0, len(block) - 1)
+                low = np.take_along_axis(block, lower[None, :], axis=0)[0]
+                high = np.take_along_axis(block, upper[None, :], axis=0)[0]
+                values[q] = np.where(count > 0, low + (high - low) * (position - lower), np.nan)
+        else:
+            values = {q: np.full(block.shape[1], np.nan) for q in quantiles}
+
+    return ColumnStatistics(df.columns, count, mean, std, values)
+
+class StreamingColumnStatistics:
+    def __init__(self, error: float = 0.01, moments: bool = True, quantiles: bool = True):
+        '''
+        Mergeable summaries of numeric columns gathered chunk by chunk
+
+        parameters:
+        error (float): rank error of the quantile sketches (e.g. 0.01 for 1%)
+        moments (bool): keep running mean and variance
+        quantiles (bool): keep a quantile sketch per column
+        '''
+        self.error = error
+        self.moments = moments
+        self.quantiles = quantiles
+        self.columns = None
+        self.running = RunningMoments()
+        self.sketches = {}
+
+    def partial_fit(self, df: pd.DataFrame) -> 'StreamingColumnStatistics':
+        '''
+        Add one chunk of numeric columns, the first chunk fixes the columns
+        '''
+        if self.columns is None:
+            self.columns = pd.Index(df.columns)
+        if self.moments:
+            self.running.update(df[self.columns])
+        if self.quantiles:
+            for column in self.columns:
+                self.sketches.setdefault(column, QuantileSketch.from_error(self.error)).update(df[column])
+        return self
+
+    def merge(self, other: 'StreamingColumnStatistics') -> 'StreamingColumnStatistics':
+        '''
+        Combine with the summaries another worker gathered over other chunks
+        '''
+        if other.columns is None:
+            return self
+        if self.columns is None:
+            self.columns = other.columns
+        self.running.merge(other.running)
+        for column, sketch in other.sketches.items():
+            self.sketches.setdefault(column, QuantileSketch.from_error(self.error)).merge(sketch)
+        return self
+
+    def statistics(self, quantiles: tuple = DEFAULT_QUANTILES) -> ColumnStatistics:
+        '''
+        Approximate statistics of everything seen so far, NaN for what is not tracked
+        '''
+        if self.columns is None:
+            raise ValueError("No data has been added to the streaming statistics")
+
+        missing = np.full(len(self.columns), np.nan)
+        if self.moments and self.running.count is not None:
+            count, mean, std = self.running.count, self.running.mean_series().to_numpy(), self.running.std().to_numpy()
+        else:
+            count, mean, std = missing, missing, missing
+
+        values = {}
+        for q in quantiles:
+            values[q] = np.array([self.sketches[column].quantile(q) for column in self.columns]) if self.quantiles else missing
+        return ColumnStatistics(self.columns, count, mean, std, values)
+
+class OutlierMask:
+    def __init__(self, bits: np.ndarray, n_rows: int, column_counts: pd.Series):
+        '''
+        Compact outlier detection result, one bit per row plus flagged counts per column
+
+        parameters:
+        bits (np.ndarray): packed row mask (np.packbits), a set bit marks a row with any outlier
+        n_rows (int): number of rows the mask covers
+        column_counts (pd.Series): number of outliers in every column
+        '''
+        self.bits = bits
+        self.n_rows = n_rows
+        self.column_counts = column_counts
+
+    @classmethod
+    def from_rows(cls, flagged: np.ndarray, column_counts: pd.Series) -> 'OutlierMask':
+        '''
+        Pack a boolean row mask
+        '''
+        return cls(np.packbits(flagged), len(flagged), column_counts)
+
+    @classmethod
+    def from_frame(cls, outliers: pd.DataFrame) -> 'OutlierMask':
+        '''
+        Compact a boolean data frame returned by detect_outliers
+        '''
+        return cls.from_rows(outliers.to_numpy().any(axis=1), outliers.sum())
+
+    def flagged(self) -> np.ndarray:
+        '''
+        Boolean mask of the rows with any outlier
+        '''
+        return np.unpackbits(self.bits, count=self.n_rows).astype(bool)
+
+    @property
+    def rows(self) -> np.ndarray:
+        '''
+        Positions (int32) of the rows with any outlier
+        '''
+        return np.flatnonzero(self.flagged()).astype('int32')
+
+    def keep(self) -> np.ndarray:
+        '''
+        Positions (int32) of the rows without outliers
+        '''
+        return np.flatnonzero(~self.flagged()).astype('int32')
+
+    def __len__(self) -> int:
+        return int(np.unpackbits(self.bits, count=self.n_rows).sum())
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        '''
+        Remove the flagged rows with one take, the index is kept
+        '''
+        if len(df) != self.n_rows:
+            raise ValueError(f"Mask covers {self.n_rows} rows, data frame has {len(df)}")
+        return df.take(self.keep())
+
+    def summary(self, top: int = 10) -> str:
+        '''
+        One line summary for logging, the columns with most outliers first
+        '''
+        counts = self.column_counts[self.column_counts > 0].sort_values(ascending=False)
+        columns = ', '.join(f"{column}={count}" for column, count in counts.head(top).items())
+        more = f" (+{len(counts) - top} more columns)" if len(counts) > top else ''
+        return f"{len(self)} of {self.n_rows} rows have outliers in {len(counts)} columns: {columns}{more}"
+
 # interface for the strategy - base class
 class OutlierDetectionStrategy(ABC):
     @abstractmethod
-    def detect_outliers(self, df: pd.DataFrame) -> pd.DataFrame:
+    def detect_outliers(self, df: pd.DataFrame, stats: ColumnStatistics = None) -> pd.DataFrame:
         '''
         detect outliers using several strategies
 
         parameters:
         df (pd.DataFrame): Data Frame that has outliers
+        stats (ColumnStatistics): precomputed statistics of df, computed here if None
         '''
         pass
 
+    def bounds(self, df: pd.DataFrame, stats: ColumnStatistics = None) -> tuple:
+        '''
+        Lower and upper limit of every column, values outside are outliers
+
+        parameters:
+        df (pd.DataFrame): Data Frame that has outliers
+        stats (ColumnStatistics): precomputed statistics of df, computed here if None
+
+        return:
+        tuple: (lower, upper) pd.Series indexed by column, None for strategies without per column limits
+        '''
+        return None
+
+    def detect_mask(self, df: pd.DataFrame, stats: ColumnStatistics = None, block_size: int = 64) -> OutlierMask:
+        '''
+        Detect outliers into a compact row mask without a boolean copy of the whole frame
+
+        parameters:
+        df (pd.DataFrame): Data Frame that has outliers
+        stats (ColumnStatistics): precomputed statistics of df, computed here if None
+        block_size (int): number of columns compared at once
+
+        return:
+        OutlierMask: flagged rows and per column counts
+        '''
+        df = df[numeric_columns(df)]
+        bounds = self.bounds(df, stats)
+        if bounds is None:
+            # strategies without bounds still return a boolean frame
+            return OutlierMask.from_frame(self.detect_outliers(df, stats=stats))
+
+        lower, upper = bounds
+        lower, upper = lower.reindex(df.columns).to_numpy(), upper.reindex(df.columns).to_numpy()
+
+        flagged = np.zeros(len(df), dtype=bool)
+        counts = np.zeros(df.shape[1], dtype='int64')
+        for start in range(0, df.shape[1], block_size):
+            block = df.iloc[:, start:start + block_size].to_numpy(dtype='float64', na_value=np.nan)
+            outliers = (block < lower[start:start + block_size]) | (block > upper[start:start + block_size])
+            flagged |= outliers.any(axis=1)
+            counts[start:start + block_size] = outliers.sum(axis=0)
+        return OutlierMask.from_rows(flagged, pd.Series(counts, index=df.columns))
+
 # concreate classes with strategies
 
 class ZScoreMethod(OutlierDetectionStrategy):
@@ -34,22 +299,29 @@ class ZScoreMethod(OutlierDetectionStrategy):
         '''
         self.threshold = threshold
     
-    def detect_outliers(self, df: pd.DataFrame) -> pd.DataFrame:
+    def detect_outliers(self, df: pd.DataFrame, stats: ColumnStatistics = None) -> pd.DataFrame:
         '''
         Detect outliers using the Z-score method.
 
         Parameters:
             df (pd.DataFrame): The DataFrame containing the data.
+            stats (ColumnStatistics): precomputed statistics of df, computed here if None
 
         Returns:
             pd.DataFrame: A boolean indicating outliers (True = outlier).
         '''
         logger.info("Detecting Outliers Using Z-Score method...")
 
-        z_score = np.abs((df - df.mean()) / df.std())
-        outliers = z_score > self.threshold
+        lower, upper = self.bounds(df, stats)
+        outliers = (df < lower) | (df > upper)
         return outliers
 
+    def bounds(self, df: pd.DataFrame, stats: ColumnStatistics = None) -> tuple:
+        # |x - mean| / std > threshold, written as limits so no z-score frame is built
+        if stats is None:
+            stats = compute_statistics(df, quantiles=())
+        return stats.mean - self.threshold * stats.std, stats.mean + self.threshold * stats.std
+
 class IQRMethod(OutlierDetectionStrategy):
     def __init__(self, multiplier: float = 1.5):
         '''
@@ -60,25 +332,270 @@ class IQRMethod(OutlierDetectionStrategy):
         '''
         self.multiplier = multiplier
     
-    def detect_outliers(self, df: pd.DataFrame) -> pd.DataFrame:
+    def detect_outliers(self, df: pd.DataFrame, stats: ColumnStatistics = None) -> pd.DataFrame:
         '''
         Detect outliers using the IQR method.
 
         Parameters:
             df (pd.DataFrame): The DataFrame containing the data.
+            stats (ColumnStatistics): precomputed statistics of df with the 0.25 and 0.75 quantiles, computed here if None
 
         Returns:
             pd.DataFrame: A boolean indicating outliers (True = outlier).
         '''
         logger.info("Detect outliers using IQR Method...")
 
-        Q1 = df.quantile(0.25)
-        Q3 = df.quantile(0.75)
+        lower, upper = self.bounds(df, stats)
+        outliers = (df < lower) | (df > upper)
+        return outliers
+
+    def bounds(self, df: pd.DataFrame, stats: ColumnStatistics = None) -> tuple:
+        if stats is None:
+            stats = compute_statistics(df, quantiles=(0.25, 0.75))
+
+        Q1 = stats.quantile(0.25)
+        Q3 = stats.quantile(0.75)
 
         IQR = Q3 - Q1
-        outliers = (df < (Q1 - self.multiplier * IQR)) | (df > (Q3 - self.multiplier * IQR))
-        return outliers
-    
+        return Q1 - self.multiplier * IQR, Q3 + self.multiplier * IQR
+
+class StreamingZScoreMethod(ZScoreMethod):
+    def __init__(self, threshold = 3):
+        '''
+        Z-score detection with mean and std gathered chunk by chunk (exact running moments)
+
+        parameters:
+        threshold (int): threshold for Z-Score
+        '''
+        super().__init__(threshold)
+        self.reset()
+
+    def reset(self):
+        self.summary = StreamingColumnStatistics(moments=True, quantiles=False)
+
+    def partial_fit(self, df: pd.DataFrame) -> 'StreamingZScoreMethod':
+        self.summary.partial_fit(df)
+        return self
+
+    def merge(self, other: 'StreamingZScoreMethod') -> 'StreamingZScoreMethod':
+        self.summary.merge(other.summary)
+        return self
+
+    def bounds(self, df: pd.DataFrame, stats: ColumnStatistics = None) -> tuple:
+        '''
+        Limits from the gathered statistics, or from statistics of df when nothing was gathered
+        '''
+        if stats is None and self.summary.columns is not None:
+            stats = self.summary.statistics(quantiles=())
+        return super().bounds(df, stats=stats)
+
+class StreamingIQRMethod(IQRMethod):
+    def __init__(self, multiplier: float = 1.5, error: float = 0.01):
+        '''
+        IQR detection with quartiles from mergeable quantile sketches gathered chunk by chunk
+
+        The quartiles are within about error in rank of the exact ones, so rows close
+        to the limits can be flagged differently than by IQRMethod.
+
+        parameters:
+        multiplier (float): The IQR multiplier for detecting outliers (default: 1.5).
+        error (float): rank error of the quartiles (e.g. 0.01 for 1%)
+        '''
+        super().__init__(multiplier)
+        self.error = error
+        self.reset()
+
+    def reset(self):
+        self.summary = StreamingColumnStatistics(error=self.error, moments=False, quantiles=True)
+
+    def partial_fit(self, df: pd.DataFrame) -> 'StreamingIQRMethod':
+        self.summary.partial_fit(df)
+        return self
+
+    def merge(self, other: 'StreamingIQRMethod') -> 'StreamingIQRMethod':
+        self.summary.merge(other.summary)
+        return self
+
+    def bounds(self, df: pd.DataFrame, stats: ColumnStatistics = None) -> tuple:
+        '''
+        Limits from the sketched quartiles, or from exact quartiles of df when nothing was gathered
+        '''
+        if stats is None and self.summary.columns is not None:
+            stats = self.summary.statistics(quantiles=(0.25, 0.75))
+        return super().bounds(df, stats=stats)
+
+class MahalanobisMethod(OutlierDetectionStrategy):
+    def __init__(self, features: list, quantile: float = 0.975, support_fraction: float = None, ridge: float = 1e-6, block_size: int = 4096, random_state: int = 42):
+        '''
+        Flag rows that are unusual jointly, by their robust Mahalanobis distance
+
+        Location and scatter come from the minimum covariance determinant estimate on
+        the complete rows, so the outliers themselves do not inflate the scatter. The
+        fitted Cholesky factor is kept and rows are scored block by block with one
+        triangular solve, which makes screening later batches cheap.
+
+        parameters:
+        features (list): columns to use, e.g. ['GrLivArea', 'SalePrice'] (identifiers and mostly constant columns would distort the scatter)
+        quantile (float): chi-squared quantile of the squared distance above which a row is an outlier
+        support_fraction (float): share of rows the robust estimate is based on, see MinCovDet
+        ridge (float): added to the diagonal relative to each variance, keeps the scatter invertible
+        block_size (int): number of rows scored at once
+        random_state (int): seed of the robust estimate
+        '''
+        self.features = features
+        self.quantile = quantile
+        self.support_fraction = support_fraction
+        self.ridge = ridge
+        self.block_size = block_size
+        self.random_state = random_state
+
+    def fit(self, df: pd.DataFrame) -> 'MahalanobisMethod':
+        '''
+        Estimate robust location and scatter, rows with missing values are skipped
+
+        parameters:
+        df (pd.DataFrame): data frame with the feature columns
+
+        return:
+        the fitted strategy
+        '''
+        features = list(self.features)
+        X = df[features].to_numpy(dtype='float64', na_value=np.nan)
+        X = X[~np.isnan(X).any(axis=1)]
+        if len(X) <= len(features):
+            raise ValueError(f"Need more than {len(features)} complete rows to fit, got {len(X)}")
+
+        logger.info(f"Fitting robust covariance on {len(X)} complete rows and {len(features)} features...")
+        mcd = MinCovDet(support_fraction=self.support_fraction, random_state=self.random_state).fit(X)
+
+        # relative to every variance so columns on different scales are regularized alike,
+        # columns that are constant on the support still get an invertible entry
+        scatter = mcd.covariance_.copy()
+        variances = np.diag(scatter)
+        scatter[np.diag_indices_from(scatter)] += self.ridge * np.where(variances > 0, variances, 1.0)
+
+        self.features_ = features
+        self.location_ = mcd.location_
+        self.scatter_ = scatter
+        self.cholesky_ = np.linalg.cholesky(scatter)
+        self.threshold_ = chi2.ppf(self.quantile, df=len(features))
+        return self
+
+    def _check_fitted(self, df: pd.DataFrame):
+        if not hasattr(self, 'cholesky_'):
+            self.fit(df)
+
+    def save(self, file_path: str):
+        '''
+        Serialize the fitted location and scatter to json, so later batches are screened alike
+
+        parameters:
+        file_path (str): path of the json file
+        '''
+        if not hasattr(self, 'cholesky_'):
+            raise NotFittedError("MahalanobisMethod must be fitted before it can be saved")
+
+        with open(file_path, 'w') as f:
+            json.dump(
+                {
+                    'features': self.features_,
+                    'quantile': self.quantile,
+                    'support_fraction': self.support_fraction,
+                    'ridge': self.ridge,
+                    'block_size': self.block_size,
+                    'random_state': self.random_state,
+                    'location': self.location_.tolist(),
+                    'scatter': self.scatter_.tolist(),
+                    'threshold': float(self.threshold_),
+                },
+                f,
+            )
+
+    @classmethod
+    def load(cls, file_path: str) -> 'MahalanobisMethod':
+        '''
+        Restore a fitted strategy from json
+
+        parameters:
+        file_path (str): path of the json file written by save
+
+        return:
+        MahalanobisMethod: fitted strategy
+        '''
+        with open(file_path) as f:
+            state = json.load(f)
+
+        strategy = cls(
+            features=state['features'], quantile=state['quantile'], support_fraction=state['support_fraction'],
+            ridge=state['ridge'], block_size=state['block_size'], random_state=state['random_state'],
+        )
+        strategy.features_ = state['features']
+        strategy.location_ = np.array(state['location'], dtype='float64')
+        strategy.scatter_ = np.array(state['scatter'], dtype='float64')
+        strategy.cholesky_ = np.linalg.cholesky(strategy.scatter_)
+        strategy.threshold_ = state['threshold']
+        return strategy
+
+    def scores(self, df: pd.DataFrame) -> np.ndarray:
+        '''
+        Squared robust Mahalanobis distance of every row, NaN for rows with missing values
+
+        parameters:
+        df (pd.DataFrame): data frame with the feature columns
+
+        return:
+        np.ndarray: one distance per row
+        '''
+        self._check_fitted(df)
+        return self._distances(self._values(df))
+
+    def _values(self, df: pd.DataFrame) -> np.ndarray:
+        # one conversion of the feature columns, blocks are then slices of this array
+        return df[self.features_].to_numpy(dtype='float64', na_value=np.nan)
+
+    def _distances(self, values: np.ndarray) -> np.ndarray:
+        distances = np.empty(len(values))
+        for start in range(0, len(values), self.block_size):
+            block = values[start:start + self.block_size]
+            # L z = (x - location) for the whole block, |z|^2 is the squared distance
+            z = solve_triangular(self.cholesky_, (block - self.location_).T, lower=True, check_finite=False)
+            distances[start:start + self.block_size] = np.einsum('ij,ij->j', z, z)
+        return distances
+
+    def _flag(self, df: pd.DataFrame) -> tuple:
+        # flagged rows and, for each of them, the feature furthest from the location in its own scale
+        values = self._values(df)
+        flagged = self._distances(values) > self.threshold_
+        deviation = np.abs(values[flagged] - self.location_) / np.sqrt(np.diag(self.scatter_))
+        return flagged, deviation.argmax(axis=1)
+
+    def detect_outliers(self, df: pd.DataFrame, stats: ColumnStatistics = None) -> pd.DataFrame:
+        '''
+        Detect rows whose robust Mahalanobis distance is above the chi-squared threshold
+
+        Parameters:
+            df (pd.DataFrame): The DataFrame containing the data.
+            stats (ColumnStatistics): not used, the fitted location and scatter are used instead
+
+        Returns:
+            pd.DataFrame: A boolean indicating outliers, set in the most deviating feature of every flagged row.
+        '''
+        logger.info("Detecting Outliers Using robust Mahalanobis distance...")
+
+        self._check_fitted(df)
+        flagged, columns = self._flag(df)
+        outliers = np.zeros((len(df), len(self.features_)), dtype=bool)
+        outliers[np.flatnonzero(flagged), columns] = True
+        return pd.DataFrame(outliers, index=df.index, columns=self.features_)
+
+    def detect_mask(self, df: pd.DataFrame, stats: ColumnStatistics = None, block_size: int = 64) -> OutlierMask:
+        logger.info("Detecting Outliers Using robust Mahalanobis distance...")
+
+        self._check_fitted(df)
+        flagged, columns = self._flag(df)
+        counts = np.bincount(columns, minlength=len(self.features_))
+        return OutlierMask.from_rows(flagged, pd.Series(counts, index=self.features_))
+
 # context class
 class OutlierDetector:
     def __init__(self, strategy: OutlierDetectionStrategy):
@@ -99,50 +616,123 @@ class OutlierDetector:
         '''
         self.strategy = strategy
 
-    def detect_outliers(self, df: pd.DataFrame) -> pd.DataFrame:
+    def detect_outliers(self, df: pd.DataFrame, stats: ColumnStatistics = None) -> pd.DataFrame:
         '''
         using specified strategy and detect outliers
 
         prameters:
         df (pd.DataFrame): Data Frame that need to be tested
+        stats (ColumnStatistics): precomputed statistics of df (see compute_statistics)
 
         return:
         pd.DataFrame: pandas data frame with boolean values if outlier exist or not
         '''
-        return self.strategy.detect_outliers(df)
-    
-    def handle_outliers(self, df: pd.DataFrame, method='remove', **kwargs) -> pd.DataFrame:
+        return self.strategy.detect_outliers(df, stats=stats)
+
+    def detect_mask(self, df: pd.DataFrame, stats: ColumnStatistics = None) -> OutlierMask:
+        '''
+        using specified strategy detect outliers into a compact row mask
+
+        parameters:
+        df (pd.DataFrame): Data Frame that need to be tested
+        stats (ColumnStatistics): precomputed statistics of df (see compute_statistics)
+
+        return:
+        OutlierMask: flagged rows and per column counts
+        '''
+        return self.strategy.detect_mask(df, stats=stats)
+
+    def handle_outliers(self, df: pd.DataFrame, method='remove', stats: ColumnStatistics = None, mask: OutlierMask = None, **kwargs) -> pd.DataFrame:
         '''
         by using methods like remove, cap handle outliers
 
+        Detection and capping look at the dense numeric columns only (the columns of stats
+        when given), the other columns, sparse ones included, are kept: removed rows are dropped from the
+        whole frame with one take and capping leaves them untouched.
+
         parameters:
         df (pd.DataFrame): Data Frame that has outliers
         method (str): either remove or cap
+        stats (ColumnStatistics): precomputed statistics of df, computed once here and shared by detection and capping if None
+        mask (OutlierMask): outliers already detected on df, detected here if None
         **kwargs (any): any other inputs
 
         return:
         pd.DataFrame: pandas data frame without outliers
         '''
-        outliers = self.detect_outliers(df)
+        if stats is None:
+            stats = compute_statistics(df[numeric_columns(df)])
+        numeric = df[stats.columns]
 
-        if outliers is None:
-            logger.error("Outlier detection returned None")
-            raise ValueError("Outlier detection must return a DataFrame or Series")
-        
         if method == 'remove':
-            logger.info("Removing Outliers...")
-            df_cleaned = df[(~outliers).all(axis=1)]
-        
+            if mask is None:
+                mask = self.detect_mask(numeric, stats=stats)
+            logger.info(f"Removing Outliers... {mask.summary()}")
+            df_cleaned = mask.apply(df)
+
         elif method == 'cap':
             logger.info("Capping Outliers...")
-            df_cleaned = df.clip(lower=df.quantile(0.01), upper=df.quantile(0.99), axis=1)
-        
+            # only the numeric columns are replaced, the others stay shared with df
+            df_cleaned = df.copy(deep=False)
+            df_cleaned[stats.columns] = numeric.clip(lower=stats.quantile(0.01), upper=stats.quantile(0.99), axis=1)
+
         else:
             logger.warning(f"Unknown method '{method}'. No outlier handling performed")
             return df
         
         return df_cleaned
     
+    def handle_outliers_stream(self, source, method: str = 'remove', error: float = 0.01) -> Iterator[pd.DataFrame]:
+        '''
+        Handle outliers of data that does not fit into memory in two streaming passes
+
+        The first pass gathers the statistics of the dense numeric columns, the second one
+        applies the mask (or the caps) chunk by chunk. Rows are removed from the whole
+        chunk, so non-numeric columns are kept.
+
+        parameters:
+        source (Iterable[pd.DataFrame]): re-iterable source of chunks, e.g. ChunkedDataSource
+        method (str): either remove or cap
+        error (float): rank error of the capping quantiles
+
+        return:
+        Iterator[pd.DataFrame]: handled chunks in source order
+        '''
+        if not hasattr(self.strategy, 'partial_fit'):
+            raise ValueError(f"{type(self.strategy).__name__} can not be fitted chunk by chunk, use a streaming strategy")
+        if iter(source) is source:
+            raise ValueError("Streaming outlier handling needs a re-iterable source (e.g. ChunkedDataSource), not an iterator")
+        if method not in ('remove', 'cap'):
+            raise ValueError(f"Unknown method '{method}'. Use remove or cap")
+
+        # first pass: statistics only
+        self.strategy.reset()
+        capping = StreamingColumnStatistics(error=error, moments=False) if method == 'cap' else None
+        columns = None
+        for chunk in source:
+            numeric = chunk[numeric_columns(chunk)]
+            columns = numeric.columns if columns is None else columns
+            self.strategy.partial_fit(numeric[columns])
+            if capping is not None:
+                capping.partial_fit(numeric[columns])
+
+        if columns is None:
+            return iter(())
+        bounds = capping.statistics(quantiles=(0.01, 0.99)) if capping is not None else None
+
+        # second pass: apply the fitted mask or caps
+        def chunks():
+            for chunk in source:
+                if method == 'remove':
+                    yield self.strategy.detect_mask(chunk[columns]).apply(chunk)
+                else:
+                    capped = chunk.copy(deep=False)
+                    capped[columns] = chunk[columns].clip(lower=bounds.quantile(0.01), upper=bounds.quantile(0.99), axis=1)
+                    yield capped
+
+        logger.info(f"{'Removing' if method == 'remove' else 'Capping'} outliers chunk by chunk...")
+        return chunks()
+
     def visualize_outliers(self, df: pd.DataFrame, features: list):
         '''
         visualize outliers for every feature
@@ -0,0 +1,265 @@
+import math
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+import logging
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+# summaries that are fed chunk by chunk and merged across workers
+
+class RunningMoments:
+    def __init__(self):
+        '''
+        Running count, mean and variance of every column (Welford / Chan et al. updates)
+
+        Every chunk is reduced as one block and combined with the running state,
+        so the result matches a single pass over all rows.
+        '''
+        self.columns = None
+        self.count = None
+        self.mean = None
+        self.m2 = None
+
+    def update(self, df: pd.DataFrame) -> 'RunningMoments':
+        '''
+        Add a chunk of rows, missing values are ignored
+
+        parameters:
+        df (pd.DataFrame): chunk with numeric columns (the first chunk fixes the columns)
+
+        return:
+        the updated summary
+        '''
+        if self.columns is None:
+            self.columns = pd.Index(df.columns)
+        block = df[self.columns].to_numpy(dtype='float64', na_value=np.nan)
+
+        valid = ~np.isnan(block)
+        count = valid.sum(axis=0).astype('float64')
+        total = np.where(valid, block, 0.0).sum(axis=0)
+        mean = np.divide(total, count, out=np.zeros_like(total), where=count > 0)
+        m2 = (np.where(valid, block - mean, 0.0) ** 2).sum(axis=0)
+
+        return self._combine(count, mean, m2)
+
+    def _combine(self, count: np.ndarray, mean: np.ndarray, m2: np.ndarray) -> 'RunningMoments':
+        if self.count is None:
+            self.count, self.mean, self.m2 = count, mean, m2
+            return self
+
+        total = self.count + count
+        delta = mean - self.mean
+        weight = np.divide(count, total, out=np.zeros_like(total), where=total > 0)
+        self.mean = self.mean + delta * weight
+        self.m2 = self.m2 + m2 + delta ** 2 * self.count * weight
+        self.count = total
+        return self
+
+    def merge(self, other: 'RunningMoments') -> 'RunningMoments':
+        '''
+        Combine with a summary of other rows (e.g. from another worker)
+
+        parameters:
+        other (RunningMoments): summary over the same columns
+
+        return:
+        the merged summary
+        '''
+        if other.count is None:
+            return self
+        if self.columns is None:
+            self.columns = other.columns
+        elif not self.columns.equals(other.columns):
+            raise ValueError("Can only merge moments over the same columns")
+        return self._combine(other.count, other.mean, other.m2)
+
+    def mean_series(self) -> pd.Series:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.Series(np.where(self.count > 0, self.mean, np.nan), index=self.columns)
+
+    def variance(self, ddof: int = 1) -> pd.Series:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.Series(np.where(self.count > ddof, self.m2 / (self.count - ddof), np.nan), index=self.columns)
+
+    def std(self, ddof: int = 1) -> pd.Series:
+        return np.sqrt(self.variance(ddof))
+
+class QuantileSketch:
+    def __init__(self, k: int = 200, seed: Optional[int] = 0):
+        '''
+        Mergeable quantile sketch of one column (KLL compactors)
+
+        Level h holds items standing for 2**h rows. A full level is sorted and every
+        other item is promoted, so memory stays O(k) however many rows are added.
+        The rank error is about 1.7 / k of the row count on average and stays below
+        roughly 2.5 / k.
+
+        parameters:
+        k (int): size of the top compactor, larger is more accurate
+        seed (int): seed for the random choice of the promoted items
+        '''
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.rng = np.random.default_rng(seed)
+
+    @classmethod
+    def from_error(cls, error: float, seed: Optional[int] = 0) -> 'QuantileSketch':
+        '''
+        Create a sketch sized for a target rank error (e.g. 0.01 for 1%)
+        '''
+        # sized for the worst case, not the average error
+        return cls(k=max(8, math.ceil(2.5 / error)), seed=seed)
+
+    @property
+    def count(self) -> int:
+        return int(sum(len(items) << level for level, items in enumerate(self.levels)))
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) <= self._capacity(level):
+                level += 1
+                continue
+
+            items = np.sort(items)
+            # an odd item out stays on its level
+            keep, items = items[len(items) - len(items) % 2:], items[:len(items) - len(items) % 2]
+            promoted = items[self.rng.integers(2)::2]
+
+            self.levels[level] = keep
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            # capacities shrink when a level is added, so recheck from the bottom
+            level = 0
+
+    def update(self, values) -> 'QuantileSketch':
+        '''
+        Add values, missing values are ignored
+
+        parameters:
+        values (array-like): values of one chunk
+
+        return:
+        the updated sketch
+        '''
+        values = np.asarray(values, dtype='float64')
+        values = values[~np.isnan(values)]
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        '''
+        Combine with a sketch of other rows
+
+        parameters:
+        other (QuantileSketch): sketch of the same column
+
+        return:
+        the merged sketch
+        '''
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compress()
+        return self
+
+    def quantile(self, q):
+        '''
+        Approximate quantile(s) of everything added so far
+
+        parameters:
+        q (float or array-like): quantile(s) between 0 and 1
+
+        return:
+        float or np.ndarray: NaN when the sketch is empty
+        '''
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(values), 2.0 ** level) for level, values in enumerate(self.levels)])
+        if len(items) == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+
+        order = np.argsort(items, kind='stable')
+        items, cumulative = items[order], np.cumsum(weights[order])
+        positions = np.searchsorted(cumulative, np.asarray(q) * cumulative[-1], side='left')
+        result = items[np.minimum(positions, len(items) - 1)]
+        return result if np.ndim(q) else float(result)
+
+class HeavyHitters:
+    def __init__(self, capacity: int = 64):
+        '''
+        Bounded frequent-items counter of one column (Misra-Gries summary)
+
+        At most `capacity` values are tracked. Any value seen in more than
+        count / (capacity + 1) rows is guaranteed to be kept, and counts are
+        underestimated by at most that much.
+
+        parameters:
+        capacity (int): number of tracked values
+        '''
+        self.capacity = capacity
+        self.counts = {}
+        self.count = 0
+
+    def _add_counts(self, counts: pd.Series):
+        merged = pd.Series(self.counts, dtype='float64').add(counts.astype('float64'), fill_value=0)
+        if len(merged) > self.capacity:
+            # subtract the (capacity + 1)-th largest count from all, which keeps the error bound after merges
+            threshold = np.partition(merged.to_numpy(), len(merged) - self.capacity - 1)[len(merged) - self.capacity - 1]
+            merged = merged - threshold
+            merged = merged[merged > 0]
+        self.counts = merged.to_dict()
+
+    def update(self, values) -> 'HeavyHitters':
+        '''
+        Add values, missing values are ignored
+
+        parameters:
+        values (array-like): values of one chunk
+
+        return:
+        the updated counter
+        '''
+        counts = pd.Series(values).value_counts(dropna=True)
+        # unused categories of a categorical column come back with a zero count
+        counts = counts[counts > 0]
+        self.count += int(counts.sum())
+        self._add_counts(counts)
+        return self
+
+    def merge(self, other: 'HeavyHitters') -> 'HeavyHitters':
+        '''
+        Combine with a counter of other rows
+
+        parameters:
+        other (HeavyHitters): counter of the same column
+
+        return:
+        the merged counter
+        '''
+        self.count += other.count
+        self._add_counts(pd.Series(other.counts, dtype='float64'))
+        return self
+
+    def most_common(self):
+        '''
+        Most frequent value seen so far (the smallest one on ties), None when empty
+        '''
+        if not self.counts:
+            return None
+        top = max(self.counts.values())
+        candidates = [value for value, count in self.counts.items() if count == top]
+        try:
+            return min(candidates)
+        except TypeError:
+            return candidates[0]
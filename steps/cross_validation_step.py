@@ -0,0 +1,42 @@
+from functools import partial
+import pandas as pd
+from zenml import step
+
+from src.cross_validation import CrossValidator
+from src.data_splitting import KFoldSplit
+from src.model_building import build_pipeline
+
+import logging
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+@step(enable_cache=False)
+def cross_validation_step(df: pd.DataFrame, target_column: str, n_splits: int = 5, n_jobs: int = None, fill_method: str = 'mean', description_path: str = None) -> dict:
+    '''
+    K-fold cross-validation of the model_building_step pipeline, the folds are trained in parallel
+
+    Parameters:
+    df (pd.DataFrame): features and target
+    target_column (str): target column in the data set
+    n_splits (int): number of folds
+    n_jobs (int): number of worker processes, default is one per fold up to the number of cores
+    fill_method (str): FillMisssingValue method of the pipeline, None to skip
+    description_path (str): data_description.txt to take fixed category vocabularies from
+
+    Returns:
+    dict: evaluation metrics averaged over the folds
+    '''
+    if not isinstance(df, pd.DataFrame):
+        logger.error(f"Expected pandas DataFrame, got {type(df)} instead.")
+        raise ValueError("Input df must be a pandas DataFrame")
+
+    validator = CrossValidator(
+        splitter=KFoldSplit(n_splits=n_splits),
+        build=partial(build_pipeline, fill_method=fill_method, description_path=description_path),
+        n_jobs=n_jobs,
+    )
+    scores = validator.run(df, target_column)
+    logger.info(f"Cross-validation metrics per fold:\n{scores}")
+
+    return scores.mean().to_dict()
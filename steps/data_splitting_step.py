@@ -1,8 +1,10 @@
 from src.data_splitting import (
     DataSplitter,
     TrainTestSplit,
-    # KFoldSplit,
-    StratifiedSplit
+    KFoldSplit,
+    StratifiedSplit,
+    SharedMemorySplit,
+    SharedSplit,
 )
 from typing import Tuple
 import pandas as pd
@@ -17,8 +19,8 @@ class DataSplittingFactory:
     def get_data_splitter(strategy: str) -> DataSplitter:
         if strategy == 'train_test_split':
             data_splitter = DataSplitter(TrainTestSplit())
-        # elif strategy == 'kfold_split':
-        #     data_splitter = DataSplitter(KFoldSplit())
+        elif strategy == 'kfold_split':
+            data_splitter = DataSplitter(KFoldSplit())
         elif strategy == 'stratified_split':
             data_splitter = DataSplitter(StratifiedSplit())
         else:
@@ -42,15 +44,40 @@ def data_splitting_step(df: pd.DataFrame, target_column: str, method: str='train
         logger.error(f"Column '{target_column}' does not exist in the DataFrame.")
         raise ValueError(f"Column '{target_column}' does not exist in the DataFrame.")
     
-    # if method == 'kfold_split':
-    #     logger.info(f"Unsupported method {method}: Method is not yet fully functional")
-    #     return None
-    
+    # k-fold returns fold positions rather than four frames, it is run by cross_validation_step
+    if method == 'kfold_split':
+        logger.error(f"Method {method} does not produce a single train/test split")
+        raise ValueError("Use cross_validation_step for k-fold splits")
+
     data_splitter = DataSplittingFactory.get_data_splitter(strategy=method)
     logger.info(f"data splitter: {data_splitter}")
     
     X_train, X_test, y_train, y_test = data_splitter.split_data(df, target_column)
     
     return X_train, X_test, y_train, y_test
-    
-    
\ No newline at end of file
+
+# not cached: a cached run would hand out handles to a file that was removed after evaluation
+@step(enable_cache=False)
+def shared_data_splitting_step(df: pd.DataFrame, target_column: str, test_size: float = 0.2, random_state: int = 42, directory: str = None) -> Tuple[SharedSplit, SharedSplit]:
+    '''
+    Train-test split that writes the data once to a memory-mapped Arrow file
+
+    Only the small train and test handles become artifacts, shared_model_building_step
+    and shared_model_evaluation_step map the same file instead of reading copies.
+    shared_model_evaluation_step removes the file once it has read the test rows.
+
+    Parameters:
+    df (pd.DataFrame): features and target
+    target_column (str): target column in the data set
+    test_size (float): The proportion of the dataset to include in the test split.
+    random_state (int): Random seed for reproducibility.
+    directory (str): Folder for the shared file, default is /dev/shm when available
+
+    Returns:
+    train, test: SharedSplit handles
+    '''
+    data_splitter = DataSplitter(SharedMemorySplit(test_size=test_size, random_state=random_state, directory=directory))
+
+    train, test = data_splitter.split_data(df, target_column)
+
+    return train, test
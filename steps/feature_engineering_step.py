@@ -4,30 +4,90 @@ from src.feature_engineering import (
     StandardScaling,
     MinMaxScaling,
     OneHotEncoding,
+    HashingEncoding,
+    DerivedFeatures,
+    FeatureGraph,
+    TargetEncoding,
+    InteractionFeatures,
 )
 import pandas as pd
 from zenml import step
 
+def get_strategy(strategy: str, features: list, sparse: bool = False, n_buckets: int = 256):
+    '''Create the feature engineering strategy with the given name, sparse and n_buckets only apply to the encoders'''
+    if strategy == 'log':
+        return LogTransformation(features)
+    elif strategy == 'standard-scaling':
+        return StandardScaling(features)
+    elif strategy == "minmax_scaling":
+        return MinMaxScaling(features)
+    elif strategy == "onehot_encoding":
+        return OneHotEncoding(features, sparse=sparse)
+    elif strategy == "derived":
+        # features names derived features from the housing library, empty adds all of them
+        return DerivedFeatures(features or None)
+    elif strategy == "target_encoding":
+        return TargetEncoding(features)
+    elif strategy == "interactions":
+        # features are the candidates, empty screens every numeric column except identifiers (Id)
+        return InteractionFeatures(features or None)
+    elif strategy == "hashing":
+        return HashingEncoding(features, n_buckets=n_buckets, sparse=sparse)
+    else:
+        raise ValueError(f"Unsupported feature engineering strategy: {strategy}")
+
 @step
 def feature_engineering_step(
     df: pd.DataFrame, 
     strategy: str = 'log', 
-    features: list = None) -> pd.DataFrame:
-    '''Perform feature engineering using specified strategies'''
+    features: list = None,
+    n_buckets: int = 256,
+    state_path: str = None) -> pd.DataFrame:
+    '''Perform feature engineering using specified strategies
+
+    The output is stored as parquet, which has no sparse columns, so the encoders here are
+    dense; model_building_step(sparse=True) one-hot encodes inside the model into a sparse
+    design matrix instead. state_path saves the fitted state of strategies that have one
+    (the target encoding mapping) as json.
+    '''
 
     if features is None:
         features = []
     
-    if strategy == 'log':
-        engineer = FeatureEngineer(LogTransformation(features))
-    elif strategy == 'standard-scaling':
-        engineer = FeatureEngineer(StandardScaling(features))
-    elif strategy == "minmax_scaling":
-        engineer = FeatureEngineer(MinMaxScaling(features))
-    elif strategy == "onehot_encoding":
-        engineer = FeatureEngineer(OneHotEncoding(features))
-    else:
-        raise ValueError(f"Unsupported feature engineering strategy: {strategy}")
+    feature_strategy = get_strategy(strategy, features, n_buckets=n_buckets)
+    engineer = FeatureEngineer(feature_strategy)
     
     transformed_df = engineer.apply_feature_engineering(df)
-    return transformed_df
\ No newline at end of file
+
+    if state_path is not None:
+        if not hasattr(feature_strategy, 'save'):
+            raise ValueError(f"Strategy '{strategy}' has no fitted state to save")
+        feature_strategy.save(state_path)
+    return transformed_df
+
+@step
+def composite_feature_engineering_step(df: pd.DataFrame, strategies: list) -> pd.DataFrame:
+    '''Perform several feature engineering strategies in one step over a single working copy
+
+    strategies is an ordered list of (strategy, features) pairs, e.g. [('log', ['SalePrice']), ('standard-scaling', ['GrLivArea'])]
+    '''
+    engineer = FeatureEngineer([get_strategy(strategy, features or []) for strategy, features in strategies])
+
+    transformed_df = engineer.apply_feature_engineering(df)
+    return transformed_df
+
+@step
+def feature_graph_step(df: pd.DataFrame, outputs: list, keep: list = None, strategies: list = None) -> pd.DataFrame:
+    '''Compute only the features reachable from the outputs the model consumes
+
+    df should be loaded with FeatureGraph().required_columns(outputs) (plus keep), raw columns that
+    only feed derived features are dropped afterwards. strategies is an ordered list of (strategy, features) pairs.
+    '''
+    keep = keep or []
+    graph = FeatureGraph()
+    # kept columns (e.g. the target) are reachable too, so strategies on them still run
+    engineer = FeatureEngineer(graph.plan(outputs + keep, [get_strategy(strategy, features or []) for strategy, features in strategies or []]))
+
+    transformed_df = engineer.apply_feature_engineering(df)
+    inputs_only = [column for column in graph.required_columns(outputs) if column not in outputs and column not in keep]
+    return transformed_df.drop(columns=[column for column in inputs_only if column in transformed_df.columns])
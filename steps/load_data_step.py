@@ -1,18 +1,58 @@
-from src.load_data import load_file
+from src.load_data import load_file, expand_paths, ChunkedDataSource, DataSchema
+from src.data_cache import DatasetCache
 from zenml import step
 
+import os
 import pandas as pd
 
 @step
-def data_load_step(file_path: str) -> pd.DataFrame:
+def data_load_step(file_path: str, use_cache: bool = True, cache_max_bytes: int = 2 * 1024 ** 3, description_path: str = None, max_workers: int = None, member: str = None, columns: list = None) -> pd.DataFrame:
     '''
     load data from file as pandas dataframe
 
     parameters:
-    file_path (str): path to the file
+    file_path (str): path to the file, a directory of shards or a glob pattern
+    use_cache (bool): reuse the columnar copy of the file from earlier runs
+    cache_max_bytes (int): total size of the cache folder before old entries are evicted
+    description_path (str): data description file to derive category and compact numeric dtypes from
+    max_workers (int): worker processes used to parse shards, default is the number of cores
+    member (str): glob pattern for the members to read from zip archives, default is every supported member
+    columns (list): columns to load (e.g. FeatureGraph.required_columns), the others are skipped by the reader
 
     return:
     pandas data frame with data from files
     '''
-    df = load_file(file_path)
+    cache = DatasetCache(max_bytes=cache_max_bytes) if use_cache else None
+    schema = DataSchema.from_description(description_path) if description_path else None
+    df = load_file(file_path, cache=cache, schema=schema, max_workers=max_workers, member=member, columns=columns)
     return df
+
+@step
+def data_stream_step(file_path: str, chunksize: int = None, chunk_bytes: int = 64 * 1024 * 1024, use_cache: bool = True, description_path: str = None, member: str = None, columns: list = None) -> ChunkedDataSource:
+    '''
+    prepare a chunked source so downstream steps can stream the file instead of
+    receiving one materialized data frame
+
+    parameters:
+    file_path (str): path to the file, a directory of shards or a glob pattern
+    chunksize (int): number of rows per chunk, takes precedence over chunk_bytes
+    chunk_bytes (int): in-memory size per chunk (default 64 MiB)
+    use_cache (bool): stream from the columnar copy of the file when an earlier run cached it
+    description_path (str): data description file to derive category and compact numeric dtypes from
+    member (str): glob pattern for the members to stream from zip archives
+    columns (list): columns to stream, default is every column
+
+    return:
+    ChunkedDataSource: re-iterable source yielding pandas data frame chunks
+    '''
+    # fail here rather than in the first downstream step that iterates the source
+    if not os.path.exists(expand_paths(file_path)[0]):
+        raise FileNotFoundError(f"No such data file: {file_path}")
+
+    cache = DatasetCache() if use_cache else None
+    # a schema is always used, it is fitted on the first pass so every chunk has the same columns and dtypes
+    schema = DataSchema.from_description(description_path) if description_path else DataSchema({}, downcast=False)
+    return ChunkedDataSource(
+        file_path, chunksize=chunksize, chunk_bytes=chunk_bytes, cache=cache, schema=schema, member=member,
+        columns=columns
+    )
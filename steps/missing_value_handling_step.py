@@ -2,20 +2,34 @@ import pandas as pd
 from src.handle_missing_values import (
     DropMissingValues,
     FillMisssingValue,
-    MissingValueHandler
+    GroupFillMissingValue,
+    MissingValueHandler,
+    StreamingFillMissingValue
 )
+from src.load_data import ChunkedDataSource
 from zenml import step
 
 @step
-def missing_value_handling_step(df: pd.DataFrame, strategy: str = "mean") -> pd.DataFrame:
+def missing_value_handling_step(df: pd.DataFrame, strategy: str = "mean", fill_categorical: bool = False, group_by: str = "Neighborhood") -> pd.DataFrame:
     if strategy == 'drop':
         handler = MissingValueHandler(DropMissingValues(axis=0))
+
+    elif strategy in ["group_mean", "group_median"]:
+        handler = MissingValueHandler(GroupFillMissingValue(group_by=group_by, method=strategy[len("group_"):]))
     
     elif strategy in ["mean", "median", "mode", "constant"]:
-        handler = MissingValueHandler(FillMisssingValue(method=strategy))
+        handler = MissingValueHandler(FillMisssingValue(method=strategy, categorical=fill_categorical))
     
     else:
         raise ValueError(f"Unsupported missing value handling strategy {strategy}")
     
     cleaned_df = handler.handling_missing_value(df)
-    return cleaned_df
\ No newline at end of file
+    return cleaned_df
+
+@step
+def streaming_missing_value_fit_step(source: ChunkedDataSource, strategy: str = "mean", fill_categorical: bool = False) -> StreamingFillMissingValue:
+    if strategy not in ["mean", "median", "mode", "constant"]:
+        raise ValueError(f"Unsupported streaming missing value handling strategy {strategy}")
+
+    # statistics are gathered chunk by chunk, the fitted strategy fills any frame later on
+    return StreamingFillMissingValue(method=strategy, categorical=fill_categorical).fit(source)
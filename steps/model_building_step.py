@@ -7,10 +7,9 @@ from zenml.enums import ArtifactType
 import mlflow
 
 from sklearn.pipeline import Pipeline
-from sklearn.compose import ColumnTransformer
-from sklearn.impute import SimpleImputer
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.linear_model import LinearRegression
+
+from src.model_building import build_pipeline
+from src.data_splitting import SharedSplit
 
 import logging
 logging.basicConfig(level=logging.INFO, format="%(message)s")
@@ -27,57 +26,54 @@ model = Model(
 )
 
 @step(enable_cache=False, experiment_tracker=experiment_tracker.name, model=model)
-def model_building_step(X_train: pd.DataFrame, y_train: pd.Series) -> Annotated[Pipeline, ArtifactConfig(name='sklearn-pipline', artifact_type=ArtifactType.MODEL)]:
+def model_building_step(X_train: pd.DataFrame, y_train: pd.Series, fill_method: str = 'mean', description_path: str = None, target_encoding: list = None, sparse: bool = False) -> Annotated[Pipeline, ArtifactConfig(name='sklearn-pipline', artifact_type=ArtifactType.MODEL)]:
     '''
     Builds and trains a Linear Regression model using scikit-learn wrapped in a pipeline.
 
     Parameters:
     X_train (pd.DataFrame): The training data features.
     y_train (pd.Series): The training data labels/target.
+    fill_method (str): FillMisssingValue method fitted on X_train and shipped with the model, None to skip.
+    description_path (str): data_description.txt to take fixed category vocabularies from, None to learn categories from X_train.
+    target_encoding (list): raw categorical columns target encoded inside the pipeline, so the mapping ships with the model.
+    sparse (bool): one-hot encode into a sparse (CSR) design matrix, memory then grows with the non-zeros.
 
     Returns:
     Pipeline: The trained scikit-learn pipeline including preprocessing and the Linear Regression model.
     '''
+    return train_model(X_train, y_train, fill_method=fill_method, description_path=description_path, target_encoding=target_encoding, sparse=sparse)
+
+@step(enable_cache=False, experiment_tracker=experiment_tracker.name, model=model)
+def shared_model_building_step(train: SharedSplit, fill_method: str = 'mean', description_path: str = None, target_encoding: list = None, sparse: bool = False) -> Annotated[Pipeline, ArtifactConfig(name='sklearn-pipline', artifact_type=ArtifactType.MODEL)]:
+    '''
+    Same as model_building_step, the training rows are taken from the shared split file.
 
+    Parameters:
+    train (SharedSplit): handle to the training rows (see shared_data_splitting_step).
+    fill_method (str): FillMisssingValue method fitted on the training rows and shipped with the model, None to skip.
+    description_path (str): data_description.txt to take fixed category vocabularies from.
+    target_encoding (list): raw categorical columns target encoded inside the pipeline.
+    sparse (bool): one-hot encode into a sparse (CSR) design matrix.
+
+    Returns:
+    Pipeline: The trained scikit-learn pipeline including preprocessing and the Linear Regression model.
+    '''
+    if not isinstance(train, SharedSplit):
+        raise ValueError("input train must be a SharedSplit handle")
+
+    X_train, y_train = train.load()
+    return train_model(X_train, y_train, fill_method=fill_method, description_path=description_path, target_encoding=target_encoding, sparse=sparse)
+
+def train_model(X_train: pd.DataFrame, y_train: pd.Series, fill_method: str = 'mean', description_path: str = None, target_encoding: list = None, sparse: bool = False) -> Pipeline:
+    '''
+    Build the pipeline and train it with mlflow autologging, shared by the model building steps.
+    '''
     if not isinstance(X_train, pd.DataFrame):
         raise ValueError("input X_train must be a pandas data frame")
     if not isinstance(y_train, pd.Series):
         raise ValueError("input y_train must be a pandas Series")
     
-    # identify categorical and numerical columns
-    categorical_cols = X_train.select_dtypes(include=['object', 'category']).columns
-    numerical_cols = X_train.select_dtypes(include='number').columns
-
-    # if numerical_cols == X_train.select_dtypes(exclude=['object', 'category']):
-    #     logger.warning("unexpected data type present in the data frame")
-    
-    logger.info(f"Categorical Columns: {categorical_cols.tolist()}")
-    logger.info(f"Numerical Columns: {numerical_cols.tolist()}")
-
-    # Define preprocessing for categorical and numerical features
-    numerical_transformar = SimpleImputer(strategy='mean')
-    categorical_transformar = Pipeline(
-        [
-            ('imputer', SimpleImputer(strategy='most_frequent')),
-            ('onehot', OneHotEncoder(handle_unknown='ignore')),
-        ]
-    )
-
-    # Bundle preprocessing for numerical and categorical data
-    preprocessor = ColumnTransformer(
-        [
-            ('num', numerical_transformar, numerical_cols),
-            ('cat', categorical_transformar, categorical_cols),
-        ]
-    )
-
-    # Defineing model training
-    pipeline = Pipeline(
-        steps=[
-            ("preprocessor", preprocessor),
-            ("model", LinearRegression())
-        ]
-    )
+    pipeline = build_pipeline(X_train, fill_method=fill_method, description_path=description_path, target_encoding=target_encoding, sparse=sparse)
 
     # start mlflow to log model process
     if not mlflow.active_run():
@@ -91,14 +87,7 @@ def model_building_step(X_train: pd.DataFrame, y_train: pd.Series) -> Annotated[
         pipeline.fit(X_train, y_train)
 
         # log the columns that the model expects
-        onehot_encoder = (
-            pipeline.named_steps['preprocessor'].transformers_[1][1].named_steps['onehot']
-        )
-
-        onehot_encoder.fit(X_train[categorical_cols])
-        expected_cols = numerical_cols.tolist() + list(
-            onehot_encoder.get_feature_names_out(categorical_cols)
-        )
+        expected_cols = list(pipeline.named_steps['preprocessor'].get_feature_names_out())
         logger.info(f"Model expects the following columns: {expected_cols}")
 
     except Exception as e:
@@ -2,6 +2,7 @@ from src.model_evaluation import (
     ModelEvaluator,
     RegressionModelEvaluation
 )
+from src.data_splitting import SharedSplit
 import pandas as pd
 from typing import Tuple
 
@@ -25,6 +26,35 @@ def model_evaluation_step(trained_model: Pipeline, X_test: pd.DataFrame, y_test:
     Returns:
     dict: A dictionary containing evaluation metrics.
     '''
+    return evaluate_model(trained_model, X_test, y_test)
+
+@step(enable_cache=False)
+def shared_model_evaluation_step(trained_model: Pipeline, test: SharedSplit) -> Tuple[dict, float]:
+    '''
+    Same as model_evaluation_step, the test rows are taken from the shared split file.
+    This is the last consumer of the file, it is removed afterwards.
+
+    Parameters:
+    trained_model (Pipeline): The trained pipeline containing the model and preprocessing steps.
+    test (SharedSplit): handle to the test rows (see shared_data_splitting_step).
+
+    Returns:
+    dict: A dictionary containing evaluation metrics.
+    '''
+    if not isinstance(test, SharedSplit):
+        raise ValueError("test should be a SharedSplit handle")
+
+    try:
+        X_test, y_test = test.load()
+    finally:
+        # the model was already trained on the same file, nothing reads it after this step
+        test.remove()
+    return evaluate_model(trained_model, X_test, y_test)
+
+def evaluate_model(trained_model: Pipeline, X_test: pd.DataFrame, y_test: pd.Series) -> Tuple[dict, float]:
+    '''
+    Preprocess the test data with the trained pipeline and evaluate its model, shared by the evaluation steps.
+    '''
     if not isinstance(X_test, pd.DataFrame):
         raise ValueError("X_test should be a pandas data frame.")
     if not isinstance(y_test, pd.Series):
@@ -32,8 +62,8 @@ def model_evaluation_step(trained_model: Pipeline, X_test: pd.DataFrame, y_test:
     
     logger.info("Applying the same preprocessing to the test data.")
 
-    # apply preprocessing to test data
-    X_test_processed = trained_model.named_steps["preprocessor"].transform(X_test)
+    # apply preprocessing (every step before the model) to test data
+    X_test_processed = trained_model[:-1].transform(X_test)
 
     # use regression strategy
     evaluator = ModelEvaluator(RegressionModelEvaluation())
@@ -2,7 +2,13 @@ from src.outlier_detection import (
     OutlierDetector,
     ZScoreMethod,
     IQRMethod,
+    StreamingZScoreMethod,
+    StreamingIQRMethod,
+    MahalanobisMethod,
+    compute_statistics,
+    numeric_columns,
 )
+from src.load_data import ChunkedDataSource
 import pandas as pd
 from zenml import step
 
@@ -11,22 +17,46 @@ import logging
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 logger = logging.getLogger(__name__)
 
+# joint outliers of size and price, the columns the robust distance is computed on by default
+MAHALANOBIS_FEATURES = ['GrLivArea', 'SalePrice']
+
 class OutlierDetectionFactory:
     @staticmethod
-    def get_outlier_detector(strategy: str) -> OutlierDetector:
+    def get_outlier_detector(strategy: str, features: list = None) -> OutlierDetector:
         if strategy == 'zscore':
             return OutlierDetector(ZScoreMethod())
         elif strategy == 'iqr':
             return OutlierDetector(IQRMethod())
+        elif strategy == 'mahalanobis':
+            return OutlierDetector(MahalanobisMethod(features=features or MAHALANOBIS_FEATURES))
         else:
             logger.error(f"No matched strategy '{strategy}' exists.")
-            raise ValueError(f"Provide a valid strategy (zscore, iqr). Provided: {strategy}")
+            raise ValueError(f"Provide a valid strategy (zscore, iqr, mahalanobis). Provided: {strategy}")
+
+class StreamingOutlierDetectionFactory:
+    @staticmethod
+    def get_outlier_detector(strategy: str, error: float = 0.01) -> OutlierDetector:
+        if strategy == 'zscore':
+            return OutlierDetector(StreamingZScoreMethod())
+        elif strategy == 'iqr':
+            return OutlierDetector(StreamingIQRMethod(error=error))
+        else:
+            logger.error(f"No matched streaming strategy '{strategy}' exists.")
+            raise ValueError(f"Provide a valid streaming strategy (zscore, iqr). Provided: {strategy}")
 
 @step
-def outlier_detection_step(df: pd.DataFrame, column_name: str, strategy: str = 'zscore', handle_method: str = 'remove') -> pd.DataFrame:
-    
-    '''Detects and removes outliers using outlier detection strategies'''
+def outlier_detection_step(df: pd.DataFrame, column_name: str, strategy: str = 'zscore', handle_method: str = 'remove', features: list = None, state_path: str = None, load_path: str = None) -> pd.DataFrame:
     
+    '''Detects and removes outliers using outlier detection strategies
+
+    Outliers are detected on the dense numeric columns (only the given features when
+    set, GrLivArea and SalePrice for mahalanobis), the rows are then removed from
+    the whole frame once, so categorical and sparse one-hot columns are kept as they are.
+    state_path saves the fitted mahalanobis location and scatter as json, load_path
+    restores such a state so a later batch is screened with it instead of being refitted
+    (the features then come from the saved state).
+    '''
+
     if df is None:
         logger.error("Received a NoneType DataFrame")
         raise ValueError("Input df must be non-null")
@@ -39,19 +69,76 @@ def outlier_detection_step(df: pd.DataFrame, column_name: str, strategy: str = '
         logger.error(f"Column '{column_name}' does not exist in the DataFrame.")
         raise ValueError(f"Column '{column_name}' does not exist in the DataFrame.")
     
-    df_numeric = df.select_dtypes(include=[int, float])
+    fitted = None
+    if load_path is not None:
+        if strategy != 'mahalanobis':
+            logger.error(f"Strategy '{strategy}' has no fitted state to load")
+            raise ValueError(f"load_path is only supported by the mahalanobis strategy. Provided: {strategy}")
+        fitted = MahalanobisMethod.load(load_path)
+        features = fitted.features_
+        logger.info(f"Loaded the fitted {strategy} state from {load_path}")
+
+    if strategy == 'mahalanobis' and features is None:
+        features = MAHALANOBIS_FEATURES
+
+    missing = [feature for feature in features or [] if feature not in df.columns]
+    if missing:
+        logger.error(f"Features {missing} do not exist in the DataFrame.")
+        raise ValueError(f"Features {missing} do not exist in the DataFrame.")
+
+    # a view of the dense numeric columns for detection, the full frame is filtered once at the end
+    df_numeric = df[numeric_columns(df if features is None else df[features])]
+
+    # one sort per column gives every statistic that detection and handling need
+    stats = compute_statistics(df_numeric)
 
     # Detect outliers
-    outlier_detector = OutlierDetectionFactory.get_outlier_detector(strategy)
-    outliers = outlier_detector.detect_outliers(df_numeric)
-    
-    logger.info(f"Detected Outliers:\n{outliers}")
+    outlier_detector = OutlierDetectionFactory.get_outlier_detector(strategy, features=features)
+    if fitted is not None:
+        outlier_detector.set_strategy(fitted)
+    outliers = outlier_detector.detect_mask(df_numeric, stats=stats)
+
+    if state_path is not None:
+        if not hasattr(outlier_detector.strategy, 'save'):
+            logger.warning(f"Strategy '{strategy}' has no fitted state to save")
+        else:
+            outlier_detector.strategy.save(state_path)
+            logger.info(f"Saved the fitted {strategy} state to {state_path}")
+
+    logger.info(f"Detected Outliers: {outliers.summary()}")
     
     # Handle outliers
     if handle_method not in ['remove', 'cap']:
         logger.error(f"Unsupported outlier handling method '{handle_method}'")
         raise ValueError(f"Handle method should be either 'remove' or 'cap'. Provided: {handle_method}")
     
-    df_cleaned = outlier_detector.handle_outliers(df_numeric, method=handle_method)
+    df_cleaned = outlier_detector.handle_outliers(df, method=handle_method, stats=stats, mask=outliers)
     
-    return df_cleaned
\ No newline at end of file
+    return df_cleaned
+
+@step
+def streaming_outlier_detection_step(source: ChunkedDataSource, strategy: str = 'zscore', handle_method: str = 'remove', error: float = 0.01) -> pd.DataFrame:
+
+    '''Detects and removes outliers of a chunked source in two streaming passes
+
+    The first pass gathers the statistics of the dense numeric columns chunk by chunk,
+    the second one removes (or caps) outliers per chunk, so only the cleaned rows are
+    held in memory. The z-score moments are exact, the IQR quartiles and the capping
+    quantiles come from sketches whose rank error is about error, so the bounds are
+    approximate and a few rows near them can differ from the in-memory step
+    (e.g. streaming IQR keeps 565 rows of train.csv where the exact quartiles keep 563).
+    '''
+
+    if handle_method not in ['remove', 'cap']:
+        logger.error(f"Unsupported outlier handling method '{handle_method}'")
+        raise ValueError(f"Handle method should be either 'remove' or 'cap'. Provided: {handle_method}")
+
+    outlier_detector = StreamingOutlierDetectionFactory.get_outlier_detector(strategy, error=error)
+    chunks = list(outlier_detector.handle_outliers_stream(source, method=handle_method, error=error))
+    if not chunks:
+        logger.warning("Received an empty source")
+        return pd.DataFrame()
+
+    df_cleaned = pd.concat(chunks, ignore_index=True)
+    logger.info(f"Kept {len(df_cleaned)} rows after streaming outlier handling")
+    return df_cleaned
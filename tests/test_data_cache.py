@@ -0,0 +1,44 @@
+# Unit tests for the columnar cache of parsed data files
+import os
+
+import pandas as pd
+
+from src.data_cache import DatasetCache
+
+
+def write_csv(path, df: pd.DataFrame) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def test_same_file_name_in_different_folders(tmp_path):
+    cache = DatasetCache(cache_dir=str(tmp_path / 'cache'))
+    first = pd.DataFrame({'Id': [1, 2], 'SalePrice': [208500.0, 181500.0]})
+    second = pd.DataFrame({'Id': [3], 'SalePrice': [223500.0]})
+    path_a = write_csv(tmp_path / 'a' / 'train.csv', first)
+    path_b = write_csv(tmp_path / 'b' / 'train.csv', second)
+
+    cache.store(path_a, first)
+    cache.store(path_b, second)
+
+    pd.testing.assert_frame_equal(cache.load(path_a), first)
+    pd.testing.assert_frame_equal(cache.load(path_b), second)
+
+
+def test_changed_file_replaces_only_its_own_entry(tmp_path):
+    cache = DatasetCache(cache_dir=str(tmp_path / 'cache'))
+    df = pd.DataFrame({'Id': [1, 2], 'SalePrice': [208500.0, 181500.0]})
+    path_a = write_csv(tmp_path / 'a' / 'train.csv', df)
+    path_b = write_csv(tmp_path / 'b' / 'train.csv', df)
+    cache.store(path_a, df)
+    cache.store(path_b, df)
+    stale = cache.entry_path(path_a)
+
+    changed = df.assign(SalePrice=df['SalePrice'] + 1)
+    write_csv(path_a, changed)
+    cache.store(path_a, changed)
+
+    assert not os.path.exists(stale)
+    pd.testing.assert_frame_equal(cache.load(path_a), changed)
+    pd.testing.assert_frame_equal(cache.load(path_b), df)
@@ -0,0 +1,86 @@
+# Unit tests for the vectorized missing value strategies, checked against pandas
+import numpy as np
+import pandas as pd
+
+from src.handle_missing_values import column_modes, compute_fill_values, FillMisssingValue, GroupFillMissingValue
+
+
+def test_column_modes_matches_pandas_tie_breaking():
+    df = pd.DataFrame(
+        {
+            'tie': [3.0, 1.0, 3.0, 1.0, np.nan],          # 1 and 3 twice each, the smallest wins
+            'clear': [5.0, 5.0, 5.0, 2.0, 2.0],
+            'nan_most': [np.nan, np.nan, np.nan, 7.0, 8.0],  # NaN is ignored, 7 and 8 tie
+            'all_nan': [np.nan] * 5,
+            'negative': [-1.0, -2.0, -2.0, -1.0, 0.0],
+        }
+    )
+
+    modes = column_modes(df.to_numpy())
+
+    expected = df.mode(dropna=True).iloc[0].to_numpy(dtype='float64')
+    np.testing.assert_array_equal(modes, expected)
+    assert modes[0] == 1.0 and np.isnan(modes[3])
+
+
+def test_column_modes_random_blocks():
+    rng = np.random.default_rng(0)
+    block = rng.integers(0, 4, size=(200, 6)).astype('float64')
+    block[rng.random(block.shape) < 0.2] = np.nan
+
+    np.testing.assert_array_equal(column_modes(block), pd.DataFrame(block).mode().iloc[0].to_numpy())
+
+
+def test_compute_fill_values_matches_pandas():
+    df = pd.DataFrame(
+        {
+            'a': [1.0, np.nan, 3.0, 4.0, 4.0],
+            'b': pd.array([1, None, 2, 2, 5], dtype='Int64'),
+            'c': ['x', 'y', None, 'y', 'x'],
+        }
+    )
+    numeric = df[['a', 'b']].astype('float64')
+
+    assert compute_fill_values(df, 'mean') == numeric.mean().to_dict()
+    assert compute_fill_values(df, 'median') == numeric.median().to_dict()
+    # categorical ties go to the first value in sorted order, like pandas
+    assert compute_fill_values(df, 'mode', categorical=True) == {'a': 4.0, 'b': 2.0, 'c': 'x'}
+
+
+def test_fill_nullable_columns_like_fillna():
+    df = pd.DataFrame(
+        {
+            'count': pd.array([1, None, 2, 4], dtype='Int64'),
+            'area': pd.array([1.5, None, 2.5, None], dtype='Float64'),
+            'plain': [1.0, 2.0, np.nan, 4.0],
+        }
+    )
+
+    filled = FillMisssingValue(method='mean').fit(df).transform(df)
+
+    # a fractional mean can not be stored in Int64, the column becomes Float64
+    expected = df.astype({'count': 'Float64'}).fillna(df.mean())
+    pd.testing.assert_frame_equal(filled, expected)
+
+
+def test_group_fill_uses_group_statistic_and_fallback():
+    df = pd.DataFrame(
+        {
+            'Neighborhood': ['A', 'A', 'A', 'B', 'B', 'C'],
+            'LotFrontage': [10.0, 20.0, np.nan, 50.0, np.nan, np.nan],
+        }
+    )
+
+    filled = GroupFillMissingValue(method='median').fit(df).transform(df)
+
+    # C has no values, it falls back to the median of the column
+    expected = df.groupby('Neighborhood')['LotFrontage'].transform('median').fillna(df['LotFrontage'].median())
+    pd.testing.assert_series_equal(filled['LotFrontage'], df['LotFrontage'].fillna(expected))
+
+
+def test_group_fill_unknown_method_keeps_data():
+    df = pd.DataFrame({'Neighborhood': ['A', 'B'], 'LotFrontage': [1.0, np.nan]})
+
+    filled = GroupFillMissingValue(method='mode').fit(df).transform(df)
+
+    pd.testing.assert_frame_equal(filled, df)
@@ -0,0 +1,31 @@
+# Unit tests for the stateless hashing encoder
+import numpy as np
+import pandas as pd
+
+from src.feature_engineering import HashingEncoding
+
+
+def test_same_buckets_for_int_and_float_columns():
+    values = [20, 60, 60, 120, 190, 20]
+    as_int = pd.DataFrame({'MSSubClass': np.array(values, dtype='int64')})
+    as_float = pd.DataFrame({'MSSubClass': np.array(values, dtype='float64')})
+    as_small = pd.DataFrame({'MSSubClass': np.array(values, dtype='int16')})
+
+    encoder = HashingEncoding(['MSSubClass'], n_buckets=32)
+
+    expected = encoder.encode(as_int).toarray()
+    np.testing.assert_array_equal(encoder.encode(as_float).toarray(), expected)
+    np.testing.assert_array_equal(encoder.encode(as_small).toarray(), expected)
+
+
+def test_chunks_encode_like_the_whole_frame():
+    df = pd.DataFrame({'MSSubClass': [20.0, 60.0, np.nan, 60.0], 'Street': ['Pave', 'Grvl', 'Pave', None]})
+    encoder = HashingEncoding(['MSSubClass', 'Street'], n_buckets=16)
+
+    # the first chunk has no missing values and is read as int, the second as float
+    first = pd.DataFrame({'MSSubClass': [20, 60], 'Street': ['Pave', 'Grvl']})
+    chunks = np.vstack([encoder.encode(first).toarray(), encoder.encode(df.iloc[2:]).toarray()])
+
+    np.testing.assert_array_equal(chunks, encoder.encode(df).toarray())
+    # missing values contribute nothing
+    assert np.abs(chunks[2]).sum() == 1 and np.abs(chunks[3]).sum() == 1
@@ -0,0 +1,44 @@
+# Unit tests for streaming json with a fixed column set and dtypes
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.load_data import JSONProcessor
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'raw', 'csvjson.json')
+
+
+def write_records(path, records):
+    with open(path, 'w') as f:
+        json.dump(records, f)
+    return str(path)
+
+
+def test_chunks_share_columns_and_dtypes(tmp_path):
+    # the first chunks are whole numbers, a later one has a gap, a key only appears at the end
+    records = [{'Id': i, 'BsmtFinSF1': i * 10} for i in range(6)]
+    records += [{'Id': 6, 'BsmtFinSF1': 'NA'}, {'Id': 7, 'BsmtFinSF1': 70, 'PoolQC': 'Gd'}]
+    path = write_records(tmp_path / 'houses.json', records)
+
+    chunks = list(JSONProcessor().load_chunks(path, chunksize=2))
+
+    assert len(chunks) == 4
+    for chunk in chunks:
+        assert list(chunk.columns) == ['Id', 'BsmtFinSF1', 'PoolQC']
+        assert chunk.dtypes.to_dict() == chunks[0].dtypes.to_dict()
+    assert chunks[0]['BsmtFinSF1'].dtype == 'float64'
+    assert chunks[0]['Id'].dtype == 'int64'
+
+    whole = pd.concat(chunks, ignore_index=True)
+    assert np.isnan(whole.loc[6, 'BsmtFinSF1'])
+    assert whole['PoolQC'].tolist()[-1] == 'Gd' and whole['PoolQC'].isna().sum() == 7
+
+
+def test_chunks_match_the_whole_file():
+    processor = JSONProcessor()
+
+    chunks = list(processor.load_chunks(DATA_PATH, chunksize=300))
+
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), processor.load_data(DATA_PATH))
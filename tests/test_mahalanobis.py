@@ -0,0 +1,60 @@
+# Unit tests for the robust Mahalanobis strategy and screening later batches with its saved state
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.outlier_detection import MahalanobisMethod
+
+FEATURES = ['GrLivArea', 'SalePrice']
+
+
+def frame(seed: int, n: int = 500) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    area = rng.normal(1500, 400, size=n)
+    df = pd.DataFrame(
+        {
+            'Id': np.arange(n),
+            'GrLivArea': area,
+            'SalePrice': 100 * area + rng.normal(0, 20000, size=n),
+        }
+    )
+    # large houses sold cheaply, outliers only jointly
+    df.loc[:4, 'GrLivArea'] = 4500
+    df.loc[:4, 'SalePrice'] = 150000
+    df.loc[5, 'SalePrice'] = np.nan
+    return df
+
+
+def test_block_scores_match_one_block():
+    df = frame(0)
+    strategy = MahalanobisMethod(FEATURES, block_size=7).fit(df)
+    whole = MahalanobisMethod(FEATURES, block_size=len(df)).fit(df)
+
+    np.testing.assert_allclose(strategy.scores(df), whole.scores(df), equal_nan=True)
+    assert np.isnan(strategy.scores(df)[5])
+
+
+def test_loaded_state_screens_a_later_batch(tmp_path):
+    path = str(tmp_path / 'mahalanobis.json')
+    fitted = MahalanobisMethod(FEATURES).fit(frame(0))
+    fitted.save(path)
+
+    batch = frame(1)
+    loaded = MahalanobisMethod.load(path)
+
+    np.testing.assert_allclose(loaded.scores(batch), fitted.scores(batch), equal_nan=True)
+    assert loaded.detect_mask(batch).flagged()[:5].all()
+
+
+def test_step_screens_with_loaded_state(tmp_path):
+    step_module = pytest.importorskip('steps.outlier_detection_step', exc_type=ImportError)
+    step = getattr(step_module.outlier_detection_step, 'entrypoint', step_module.outlier_detection_step)
+
+    path = str(tmp_path / 'mahalanobis.json')
+    step(frame(0), 'SalePrice', strategy='mahalanobis', state_path=path)
+
+    batch = frame(1)
+    screened = step(batch, 'SalePrice', strategy='mahalanobis', load_path=path)
+    flagged = MahalanobisMethod.load(path).detect_mask(batch).flagged()
+
+    pd.testing.assert_frame_equal(screened, batch[~flagged])
@@ -0,0 +1,66 @@
+# Unit tests for the shared outlier statistics, checked against pandas
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.outlier_detection import compute_statistics, OutlierDetector, ZScoreMethod, IQRMethod
+
+QUANTILES = (0.01, 0.25, 0.5, 0.75, 0.99)
+
+
+@pytest.fixture
+def frame() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            'normal': rng.normal(size=501),
+            'skewed': rng.lognormal(size=501),
+            'integers': rng.integers(0, 10, size=501),
+        }
+    )
+    return df
+
+
+def assert_matches_pandas(df: pd.DataFrame):
+    stats = compute_statistics(df, quantiles=QUANTILES)
+
+    pd.testing.assert_series_equal(stats.count, df.count(), check_dtype=False)
+    pd.testing.assert_series_equal(stats.mean, df.mean(), check_names=False)
+    pd.testing.assert_series_equal(stats.std, df.std(), check_names=False)
+    for q in QUANTILES:
+        pd.testing.assert_series_equal(stats.quantile(q), df.quantile(q), check_names=False)
+
+
+def test_statistics_without_missing_values(frame):
+    # the partition path
+    assert_matches_pandas(frame)
+
+
+def test_statistics_with_missing_values(frame):
+    # the sort path, every column has a different number of values
+    frame = frame.astype('float64')
+    frame.iloc[::3, 0] = np.nan
+    frame.iloc[::11, 1] = np.nan
+    frame.iloc[:, 2] = np.nan
+    assert_matches_pandas(frame)
+
+
+def test_statistics_skip_sparse_columns(frame):
+    frame['onehot'] = pd.arrays.SparseArray(np.eye(1, len(frame), 3).ravel(), fill_value=0.0)
+
+    stats = compute_statistics(frame)
+
+    assert 'onehot' not in stats.columns
+
+
+def test_detect_mask_matches_boolean_frame(frame):
+    frame.loc[[5, 50], 'skewed'] = 1000.0
+    stats = compute_statistics(frame)
+
+    for strategy in (ZScoreMethod(), IQRMethod()):
+        detector = OutlierDetector(strategy)
+        mask = detector.detect_mask(frame, stats=stats)
+        outliers = detector.detect_outliers(frame, stats=stats)
+
+        np.testing.assert_array_equal(mask.flagged(), outliers.any(axis=1).to_numpy())
+        assert 5 in mask.rows and 50 in mask.rows
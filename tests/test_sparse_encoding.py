@@ -0,0 +1,67 @@
+# Unit tests for one-hot encoding that has to survive step outputs (parquet) and reach the model sparse
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.sparse as sp
+
+from src.feature_engineering import FeatureEngineer, OneHotEncoding
+from src.model_building import build_pipeline
+
+
+def frame() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    n = 200
+    return pd.DataFrame(
+        {
+            'Neighborhood': rng.choice(['NAmes', 'CollgCr', 'OldTown', 'Edwards'], size=n),
+            'Exterior2nd': rng.choice(['VinylSd', 'HdBoard', 'Plywood'], size=n),
+            'GrLivArea': rng.integers(500, 3000, size=n).astype('float64'),
+            'SalePrice': rng.normal(180000, 40000, size=n),
+        }
+    )
+
+
+def parquet_round_trip(df: pd.DataFrame) -> pd.DataFrame:
+    # what the step materializer does with a data frame output
+    buffer = io.BytesIO()
+    df.to_parquet(buffer)
+    buffer.seek(0)
+    return pd.read_parquet(buffer)
+
+
+def test_one_hot_step_output_round_trips_through_parquet():
+    # the encoding as feature_engineering_step configures it
+    encoded = FeatureEngineer(OneHotEncoding(['Neighborhood', 'Exterior2nd'])).apply_feature_engineering(frame())
+
+    pd.testing.assert_frame_equal(parquet_round_trip(encoded), encoded)
+
+
+def test_sparse_frames_can_not_be_step_outputs():
+    encoded = FeatureEngineer(OneHotEncoding(['Neighborhood'], sparse=True)).apply_feature_engineering(frame())
+
+    with pytest.raises(Exception):
+        parquet_round_trip(encoded)
+
+
+def test_feature_engineering_step_output_round_trips_through_parquet():
+    step_module = pytest.importorskip('steps.feature_engineering_step', exc_type=ImportError)
+
+    step = getattr(step_module.feature_engineering_step, 'entrypoint', step_module.feature_engineering_step)
+    encoded = step(frame(), strategy='onehot_encoding', features=['Neighborhood', 'Exterior2nd'])
+
+    pd.testing.assert_frame_equal(parquet_round_trip(encoded), encoded)
+
+
+def test_sparse_pipeline_matches_dense_pipeline():
+    df = parquet_round_trip(frame())
+    X, y = df.drop(columns=['SalePrice']), df['SalePrice']
+
+    dense = build_pipeline(X, sparse=False).fit(X, y)
+    sparse = build_pipeline(X, sparse=True).fit(X, y)
+
+    assert sp.issparse(sparse.named_steps['preprocessor'].transform(X))
+    assert not sp.issparse(dense.named_steps['preprocessor'].transform(X))
+    # the sparse least squares solver is iterative, the fit agrees to its tolerance
+    np.testing.assert_allclose(sparse.predict(X), dense.predict(X), rtol=1e-2)
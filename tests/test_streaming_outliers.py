@@ -0,0 +1,53 @@
+# Unit tests for outlier handling of chunked sources
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.outlier_detection import OutlierDetector, ZScoreMethod, IQRMethod, StreamingZScoreMethod, StreamingIQRMethod
+
+
+def frame() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    n = 2000
+    df = pd.DataFrame(
+        {
+            'Neighborhood': rng.choice(['NAmes', 'CollgCr', 'OldTown'], size=n),
+            'GrLivArea': rng.lognormal(7.3, 0.3, size=n),
+            'SalePrice': rng.lognormal(12, 0.4, size=n),
+        }
+    )
+    df.loc[::50, 'SalePrice'] = np.nan
+    return df
+
+
+def chunks(df: pd.DataFrame, size: int = 300) -> list:
+    # a list can be iterated twice, like ChunkedDataSource
+    return [df.iloc[start:start + size] for start in range(0, len(df), size)]
+
+
+def test_streaming_zscore_removes_like_in_memory():
+    df = frame()
+    streamed = pd.concat(OutlierDetector(StreamingZScoreMethod()).handle_outliers_stream(chunks(df)))
+    expected = OutlierDetector(ZScoreMethod()).handle_outliers(df)
+
+    pd.testing.assert_frame_equal(streamed, expected)
+
+
+def test_streaming_iqr_stays_close_to_in_memory():
+    df = frame()
+    streamed = pd.concat(OutlierDetector(StreamingIQRMethod(error=0.01)).handle_outliers_stream(chunks(df)))
+    expected = OutlierDetector(IQRMethod()).handle_outliers(df)
+
+    # sketched quartiles only move the limits slightly, rows near them may differ
+    assert abs(len(streamed) - len(expected)) <= 0.01 * len(df)
+    assert streamed.index.isin(expected.index).mean() > 0.99
+
+
+def test_streaming_step_needs_a_reiterable_source():
+    step_module = pytest.importorskip('steps.outlier_detection_step', exc_type=ImportError)
+    step = getattr(step_module.streaming_outlier_detection_step, 'entrypoint', step_module.streaming_outlier_detection_step)
+
+    df = frame()
+    assert len(step(chunks(df), strategy='zscore')) == len(OutlierDetector(ZScoreMethod()).handle_outliers(df))
+    with pytest.raises(ValueError):
+        step(iter(chunks(df)), strategy='zscore')
@@ -0,0 +1,119 @@
+# Unit tests for the mergeable streaming summaries
+import logging
+
+import numpy as np
+import pandas as pd
+
+from src.streaming_statistics import RunningMoments, QuantileSketch, HeavyHitters
+from src.handle_missing_values import StreamingFillMissingValue
+
+
+def rank_error(values: np.ndarray, estimates: np.ndarray, quantiles: np.ndarray) -> float:
+    # largest distance between the requested quantile and the true rank of the estimate
+    ranks = np.searchsorted(np.sort(values), estimates, side='right') / len(values)
+    return np.abs(ranks - quantiles).max()
+
+
+def test_quantile_sketch_error_bound():
+    values = np.random.default_rng(0).lognormal(size=50_000)
+    quantiles = np.linspace(0.01, 0.99, 99)
+
+    for error in (0.05, 0.01):
+        sketch = QuantileSketch.from_error(error)
+        for chunk in np.array_split(values, 25):
+            sketch.update(chunk)
+
+        assert sketch.count == len(values)
+        assert rank_error(values, sketch.quantile(quantiles), quantiles) <= error
+
+
+def test_quantile_sketch_merge_matches_one_pass():
+    rng = np.random.default_rng(1)
+    values = rng.normal(size=40_000)
+    quantiles = np.array([0.01, 0.25, 0.5, 0.75, 0.99])
+
+    # one sketch per shard, as workers would build them
+    shards = [QuantileSketch.from_error(0.01, seed=seed).update(shard) for seed, shard in enumerate(np.array_split(values, 8))]
+    merged = shards[0]
+    for shard in shards[1:]:
+        merged.merge(shard)
+
+    assert merged.count == len(values)
+    assert rank_error(values, merged.quantile(quantiles), quantiles) <= 0.01
+    # memory stays bounded by the sketch size, not the row count
+    assert sum(len(items) for items in merged.levels) < 3 * merged.k
+
+
+def test_quantile_sketch_small_inputs_are_exact():
+    values = np.array([3.0, np.nan, 1.0, 2.0])
+    sketch = QuantileSketch(k=200).update(values)
+
+    assert sketch.count == 3
+    assert sketch.quantile(0.5) == 2.0
+    assert np.isnan(QuantileSketch().quantile(0.5))
+
+
+def test_heavy_hitters_keeps_frequent_values():
+    rng = np.random.default_rng(2)
+    # a few frequent values among many rare ones
+    values = np.concatenate([np.repeat([1, 2, 3], [3000, 2000, 1000]), rng.integers(100, 10_000, size=4000)])
+    rng.shuffle(values)
+    capacity = 16
+
+    counter = HeavyHitters(capacity=capacity)
+    for chunk in np.array_split(values, 10):
+        counter.update(chunk)
+
+    exact = pd.Series(values).value_counts()
+    bound = len(values) / (capacity + 1)
+    assert counter.count == len(values)
+    assert len(counter.counts) <= capacity
+    for value, count in exact[exact > bound].items():
+        assert value in counter.counts
+        assert count - bound <= counter.counts[value] <= count
+    assert counter.most_common() == 1
+
+
+def test_heavy_hitters_merge():
+    values = pd.Series(['a'] * 50 + ['b'] * 30 + [f"rare{i}" for i in range(40)])
+    parts = [HeavyHitters(capacity=4).update(part) for part in np.array_split(values.sample(frac=1, random_state=0), 3)]
+    merged = parts[0].merge(parts[1]).merge(parts[2])
+
+    bound = len(values) / 5
+    assert merged.count == len(values)
+    assert 50 - bound <= merged.counts['a'] <= 50
+    assert 30 - bound <= merged.counts['b'] <= 30
+    assert merged.most_common() == 'a'
+
+
+def test_running_moments_merge_matches_pandas():
+    df = pd.DataFrame(np.random.default_rng(3).normal(size=(1000, 3)), columns=['a', 'b', 'c'])
+    df.iloc[::7, 1] = np.nan
+
+    first, second = RunningMoments().update(df.iloc[:400]), RunningMoments().update(df.iloc[400:])
+    moments = first.merge(second)
+
+    pd.testing.assert_series_equal(moments.mean_series(), df.mean(), check_names=False)
+    pd.testing.assert_series_equal(moments.std(), df.std(), check_names=False)
+
+
+def test_streaming_fill_logs_columns_without_a_mode(caplog):
+    df = pd.DataFrame({'Id': np.arange(1000, dtype='float64'), 'MSSubClass': np.tile([20.0, 60.0, 20.0, 50.0], 250)})
+    df.loc[::7, :] = np.nan
+
+    strategy = StreamingFillMissingValue(method='mode', heavy_hitters=16)
+    with caplog.at_level(logging.WARNING):
+        strategy.fit(df.iloc[start:start + 100] for start in range(0, len(df), 100))
+
+    assert strategy.fill_values_ == {'MSSubClass': 20.0}
+    assert "['Id']" in caplog.text
+
+
+def test_streaming_median_within_sketch_bound():
+    values = np.random.default_rng(1).lognormal(size=20_000)
+    df = pd.DataFrame({'LotArea': values})
+
+    strategy = StreamingFillMissingValue(method='median', sketch_size=200)
+    strategy.fit(df.iloc[start:start + 1000] for start in range(0, len(df), 1000))
+
+    assert rank_error(values, np.array([strategy.fill_values_['LotArea']]), np.array([0.5])) <= 2.5 / 200
@@ -0,0 +1,73 @@
+# Unit tests for out-of-fold target encoding
+import numpy as np
+import pandas as pd
+
+from src.feature_engineering import TargetEncoding
+
+
+def frame() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    n = 300
+    df = pd.DataFrame({'Neighborhood': rng.choice(['A', 'B', 'C', None], size=n), 'SalePrice': rng.normal(100, 10, size=n)})
+    df.loc[df['Neighborhood'] == 'A', 'SalePrice'] += 50
+    return df
+
+
+def test_out_of_fold_encoding_matches_reference():
+    df = frame()
+    encoder = TargetEncoding(['Neighborhood'], n_splits=4, smoothing=5.0, random_state=1)
+
+    encoded = encoder.transform(df)
+
+    # reference: every row gets the smoothed mean of its category over the other folds only
+    folds = np.random.default_rng(1).permutation(len(df)) % 4
+    category = df['Neighborhood'].fillna('<missing>')
+    expected = np.empty(len(df))
+    for i in range(len(df)):
+        others = df[folds != folds[i]]
+        prior = others['SalePrice'].mean()
+        same = others['SalePrice'][category[folds != folds[i]] == category[i]]
+        expected[i] = (same.sum() + 5.0 * prior) / (len(same) + 5.0)
+
+    np.testing.assert_allclose(encoded['Neighborhood'].to_numpy(), expected)
+    # the input is not modified
+    assert df['Neighborhood'].dtype == object
+
+
+def test_fitted_mapping_and_unseen_categories():
+    df = frame()
+    encoder = TargetEncoding(['Neighborhood'], smoothing=5.0)
+    encoder.transform(df)
+
+    prior = df['SalePrice'].mean()
+    grouped = df.groupby(df['Neighborhood'].fillna('<missing>'))['SalePrice'].agg(['sum', 'count'])
+    new = pd.DataFrame({'Neighborhood': ['A', 'Z', None]})
+
+    encoded = encoder.encode(new)['Neighborhood'].to_numpy()
+
+    expected_a = (grouped.loc['A', 'sum'] + 5.0 * prior) / (grouped.loc['A', 'count'] + 5.0)
+    expected_missing = (grouped.loc['<missing>', 'sum'] + 5.0 * prior) / (grouped.loc['<missing>', 'count'] + 5.0)
+    np.testing.assert_allclose(encoded, [expected_a, prior, expected_missing])
+
+
+def test_save_and_load_round_trip(tmp_path):
+    df = frame()
+    encoder = TargetEncoding(['Neighborhood'])
+    encoder.transform(df)
+
+    path = tmp_path / 'target_encoding.json'
+    encoder.save(str(path))
+    loaded = TargetEncoding.load(str(path))
+
+    new = pd.DataFrame({'Neighborhood': ['A', 'B', 'Z', None]})
+    pd.testing.assert_frame_equal(loaded.encode(new), encoder.encode(new))
+
+
+def test_pipeline_fit_transform_uses_y():
+    df = frame()
+    X, y = df[['Neighborhood']], df['SalePrice']
+
+    from_y = TargetEncoding(['Neighborhood'], random_state=3).fit_transform(X, y)
+    from_column = TargetEncoding(['Neighborhood'], random_state=3).transform(df)
+
+    np.testing.assert_allclose(from_y['Neighborhood'], from_column['Neighborhood'])
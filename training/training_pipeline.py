@@ -18,7 +18,7 @@ def ml_pipeline():
 
     # load data step
     data = data_load_step(
-        "./data/raw/train.csv"
+        "./data/raw/train.csv", description_path="./data/raw/data_description.txt"
     )
 
     # handling missing values
@@ -36,7 +36,7 @@ def ml_pipeline():
     X_train, X_test, y_train, y_test = data_splitting_step(clearned_data, target_column="SalePrice")
 
     # model building
-    model = model_building_step(X_train, y_train)
+    model = model_building_step(X_train, y_train, description_path="./data/raw/data_description.txt")
 
     # evaluate the model
     evaluation_matrics, mse = model_evaluation_step(